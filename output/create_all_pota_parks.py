@@ -6,57 +6,85 @@ Uses the complete parks list from pota.app/all_parks_ext.csv
 """
 
 import csv
-import subprocess
+import gzip
+import re
+import shutil
 import time
+import urllib.error
+import urllib.request
 from pathlib import Path
 import sys
 
+from umlauts import convert_umlauts
+
+POTA_PARKS_URL = 'https://pota.app/all_parks_ext.csv'
+
+# 1 MiB file buffers, a few thousand park rows per read/write syscall
+IO_BUFFER_SIZE = 1 << 20
+
+# Rows buffered before each bulk write
+WRITE_BATCH_SIZE = 10000
+
+# Plain decimal degrees, e.g. 47.4833 or -0.5
+COORDINATE_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+# Memory-channels-processor format
+PARK_FIELDNAMES = [
+    'callsign', 'name', 'band', 'freq_tx', 'freq_rx', 'ctcss_tx', 'ctcss_rx',
+    'c4fm', 'dmr', 'dmr_id', 'dmr_cc', 'dstar', 'dstar_rpt1', 'dstar_rpt2',
+    'fm', 'landmark', 'state', 'country', 'country_code', 'loc_exact',
+    'lat', 'long', 'locator', 'sea_level', 'skip', 'scan_group',
+    'source_id', 'source_name', 'source_provider', 'source_type',
+    'source_license', 'source_url', 'offset', 'dup', 'ctcss',
+    'simplex', 'split', 'multimode', 'name_formatted', 'distance', 'heading', 'active'
+]
+
+# Icom GPS format
+ICOM_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+# Group number, group name and UTC offset per country
+COUNTRY_META = {
+    'AT': (75, 'POTA-AT', '+1:00'),
+    'SK': (76, 'POTA-SK', '+1:00'),
+    'SG': (77, 'POTA-SG', '+8:00')
+}
+DEFAULT_META = (75, 'POTA-All', '+1:00')  # Default Central Europe
+
+def quote_field(value):
+    """Quote a CSV field the way csv.writer does with QUOTE_MINIMAL."""
+    if ',' in value or '"' in value or '\n' in value or '\r' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
 def download_pota_parks():
     """Download the official POTA parks CSV with coordinates."""
     try:
         print("📡 Downloading official POTA parks database...")
-        result = subprocess.run(
-            ['curl', '-s', 'https://pota.app/all_parks_ext.csv', '-o', 'all_parks_ext.csv'],
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-        if result.returncode == 0:
-            print("✅ Downloaded POTA parks database")
-            return True
-        else:
-            print(f"❌ Error downloading POTA data: {result.stderr}")
-            return False
-    except (subprocess.TimeoutExpired, Exception) as e:
+        request = urllib.request.Request(POTA_PARKS_URL, headers={'Accept-Encoding': 'gzip'})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            stream = response
+            if response.headers.get('Content-Encoding') == 'gzip':
+                stream = gzip.GzipFile(fileobj=response)
+            
+            # Stream into a temporary file so a failed download never leaves
+            # a truncated all_parks_ext.csv behind
+            with open('all_parks_ext.csv.part', 'wb') as outfile:
+                shutil.copyfileobj(stream, outfile, IO_BUFFER_SIZE)
+        
+        Path('all_parks_ext.csv.part').replace('all_parks_ext.csv')
+        print("✅ Downloaded POTA parks database")
+        return True
+    except (urllib.error.URLError, OSError) as e:
         print(f"❌ Error downloading POTA data: {e}")
         return False
 
-def convert_umlauts(text):
-    """Convert umlauts and special characters to ASCII equivalents."""
-    if not text:
-        return text
-    
-    umlaut_map = {
-        'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue',
-        'ß': 'ss', 'é': 'e', 'É': 'E', 'è': 'e', 'È': 'E',
-        'á': 'a', 'Á': 'A', 'à': 'a', 'À': 'A', 'í': 'i', 'Í': 'I',
-        'ì': 'i', 'Ì': 'I', 'ó': 'o', 'Ó': 'O', 'ò': 'o', 'Ò': 'O',
-        'ú': 'u', 'Ú': 'U', 'ù': 'u', 'Ù': 'U', 'ñ': 'n', 'Ñ': 'N',
-        'ç': 'c', 'Ç': 'C', '–': '-', '—': '-', '"': '"', '"': '"',
-        ''': "'", ''': "'", '…': '...', 'ř': 'r', 'Ř': 'R',
-        'ľ': 'l', 'Ľ': 'L', 'š': 's', 'Š': 'S', 'ť': 't', 'Ť': 'T',
-        'ž': 'z', 'Ž': 'Z', 'ý': 'y', 'Ý': 'Y', 'č': 'c', 'Č': 'C',
-        'ď': 'd', 'Ď': 'D', 'ň': 'n', 'Ň': 'N', 'ô': 'o', 'Ô': 'O'
-    }
-    
-    result = text
-    for umlaut, replacement in umlaut_map.items():
-        result = result.replace(umlaut, replacement)
-    
-    return result
-
-def create_all_pota_parks_csv(countries=['AT', 'SK', 'SG'], output_file='all_pota_parks.csv'):
-    """Create comprehensive POTA parks CSV for specified countries."""
+def create_all_pota_parks_csv(countries=['AT', 'SK', 'SG'], output_file='all_pota_parks.csv',
+                              icom_output_file='all_pota_parks_icom.csv'):
+    """Create comprehensive POTA parks CSV and Icom GPS CSV for specified countries."""
     
     if not Path('all_parks_ext.csv').exists():
         if not download_pota_parks():
@@ -71,35 +99,60 @@ def create_all_pota_parks_csv(countries=['AT', 'SK', 'SG'], output_file='all_pot
         'SG': 'Singapore'
     }
     
-    # Read and process POTA parks
-    parks = {}
+    country_set = frozenset(countries)
+    
+    # Stream parks from the source file straight into both output files, through
+    # temporary files so a failed or empty run never leaves partial outputs behind
+    output_part = Path(output_file + '.part')
+    icom_part = Path(icom_output_file + '.part')
+    park_count = 0
+    country_counts = {}
+    active_counts = {}
     
     try:
-        with open('all_parks_ext.csv', 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
+        with open('all_parks_ext.csv', 'r', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as csvfile, \
+             open(output_part, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as outfile, \
+             open(icom_part, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as icomfile:
+            reader = csv.reader(csvfile)
+            outfile.write(','.join(PARK_FIELDNAMES) + '\r\n')
+            batch = []
+            
+            icom_writer = csv.writer(icomfile)
+            icom_writer.writerow(ICOM_HEADER)
+            icom_batch = []
+            
+            # Resolve column positions once from the header
+            columns = {name: i for i, name in enumerate(next(reader))}
+            ref_idx = columns['reference']
+            name_idx = columns['name']
+            active_idx = columns['active']
+            location_idx = columns['locationDesc']
+            lat_idx = columns['latitude']
+            lon_idx = columns['longitude']
+            grid_idx = columns['grid']
             
             for row in reader:
-                ref = row.get('reference', '').strip('"')
-                name = row.get('name', '').strip('"')
-                active = row.get('active', '').strip('"')
-                location = row.get('locationDesc', '').strip('"')
-                lat = row.get('latitude', '').strip('"')
-                lon = row.get('longitude', '').strip('"')
-                grid = row.get('grid', '').strip('"')
-                
-                # Filter by country prefix
-                country_prefix = ref.split('-')[0] if '-' in ref else ''
-                if country_prefix not in countries:
+                ref = row[ref_idx]
+
+                # Filter by country prefix before touching the other fields,
+                # the worldwide list is mostly parks outside our countries
+                country_prefix, dash, _ = ref.partition('-')
+                if not dash or country_prefix not in country_set:
                     continue
-                
+
+                name = row[name_idx]
+                active = row[active_idx]
+                location = row[location_idx]
+                lat = row[lat_idx]
+                lon = row[lon_idx]
+                grid = row[grid_idx]
+
                 # Skip invalid entries
                 if not ref or not name or not lat or not lon:
                     continue
                 
-                try:
-                    lat = float(lat)
-                    lon = float(lon)
-                except ValueError:
+                # Validate coordinates but pass the source text through
+                if not (COORDINATE_RE.fullmatch(lat) and COORDINATE_RE.fullmatch(lon)):
                     continue
                 
                 # Clean names for Icom display
@@ -109,178 +162,66 @@ def create_all_pota_parks_csv(countries=['AT', 'SK', 'SG'], output_file='all_pot
                 
                 country_name = country_map.get(country_prefix, country_prefix)
                 
-                parks[ref] = {
-                    'callsign': clean_ref,
-                    'name': clean_name,
-                    'band': 'gps',
-                    'freq_tx': '',
-                    'freq_rx': '',
-                    'ctcss_tx': '',
-                    'ctcss_rx': '',
-                    'c4fm': 'False',
-                    'dmr': 'False',
-                    'dmr_id': '',
-                    'dmr_cc': '',
-                    'dstar': 'False',
-                    'dstar_rpt1': '',
-                    'dstar_rpt2': '',
-                    'fm': 'False',
-                    'landmark': clean_location,
-                    'state': clean_location,
-                    'country': country_name,
-                    'country_code': country_prefix,
-                    'loc_exact': 'True',
-                    'lat': lat,
-                    'long': lon,
-                    'locator': grid,
-                    'sea_level': '',
-                    'skip': 'False',
-                    'scan_group': '',
-                    'source_id': 'pota-all-parks',
-                    'source_name': 'POTA All Parks',
-                    'source_provider': 'Parks on the Air',
-                    'source_type': 'static',
-                    'source_license': '',
-                    'source_url': 'https://pota.app/',
-                    'offset': '0',
-                    'dup': '',
-                    'ctcss': 'False',
-                    'simplex': 'True',
-                    'split': 'False',
-                    'multimode': 'False',
-                    'name_formatted': f"{clean_ref} {clean_name}",
-                    'distance': '',
-                    'heading': '',
-                    'active': active
-                }
+                # Same column order as PARK_FIELDNAMES, only the park fields
+                # can need quoting, the rest are constants
+                ref_q = quote_field(clean_ref)
+                name_q = quote_field(clean_name)
+                location_q = quote_field(clean_location)
+                batch.append(
+                    f"{ref_q},{name_q},gps,,,,,False,False,,,False,,,"
+                    f"False,{location_q},{location_q},{country_name},{country_prefix},True,"
+                    f"{lat},{lon},{quote_field(grid)},,False,,"
+                    f"pota-all-parks,POTA All Parks,Parks on the Air,static,"
+                    f",https://pota.app/,0,,False,"
+                    f"True,False,False,{quote_field(f'{clean_ref} {clean_name}')},,,{quote_field(active)}\r\n"
+                )
+                
+                # Icom GPS waypoint, names truncated for display, no frequency
+                group_no, group_name, utc_offset = COUNTRY_META.get(country_prefix, DEFAULT_META)
+                icom_batch.append((
+                    group_no, group_name, clean_ref[:16], clean_name[:16],
+                    '', '', '', '', '', 'GPS', '', '', '', 'Exact',
+                    lat, lon, utc_offset
+                ))
+                
+                park_count += 1
+                country_counts[country_prefix] = country_counts.get(country_prefix, 0) + 1
+                if active == '1':
+                    active_counts[country_prefix] = active_counts.get(country_prefix, 0) + 1
+                
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    outfile.writelines(batch)
+                    icom_writer.writerows(icom_batch)
+                    batch.clear()
+                    icom_batch.clear()
+            
+            outfile.writelines(batch)
+            icom_writer.writerows(icom_batch)
                 
     except Exception as e:
+        output_part.unlink(missing_ok=True)
+        icom_part.unlink(missing_ok=True)
         print(f"❌ Error reading POTA parks: {e}")
         return 0
     
-    if not parks:
+    if not park_count:
+        output_part.unlink()
+        icom_part.unlink()
         print("❌ No valid parks found")
         return 0
     
-    # Write CSV file in memory-channels-processor format
-    fieldnames = [
-        'callsign', 'name', 'band', 'freq_tx', 'freq_rx', 'ctcss_tx', 'ctcss_rx',
-        'c4fm', 'dmr', 'dmr_id', 'dmr_cc', 'dstar', 'dstar_rpt1', 'dstar_rpt2',
-        'fm', 'landmark', 'state', 'country', 'country_code', 'loc_exact',
-        'lat', 'long', 'locator', 'sea_level', 'skip', 'scan_group',
-        'source_id', 'source_name', 'source_provider', 'source_type',
-        'source_license', 'source_url', 'offset', 'dup', 'ctcss',
-        'simplex', 'split', 'multimode', 'name_formatted', 'distance', 'heading', 'active'
-    ]
-    
-    with open(output_file, 'w', encoding='utf-8', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for park_data in parks.values():
-            writer.writerow(park_data)
+    output_part.replace(output_file)
+    icom_part.replace(icom_output_file)
     
     # Print statistics
-    country_counts = {}
-    active_counts = {}
-    for park in parks.values():
-        country = park['country_code']
-        country_counts[country] = country_counts.get(country, 0) + 1
-        if park['active'] == '1':
-            active_counts[country] = active_counts.get(country, 0) + 1
-    
-    print(f"✅ Created {len(parks)} POTA parks in {output_file}")
+    print(f"✅ Created {park_count} POTA parks in {output_file} and {icom_output_file}")
     for country in countries:
         total = country_counts.get(country, 0)
         active = active_counts.get(country, 0)
         country_name = country_map.get(country, country)
         print(f"   📍 {country_name}: {total} parks ({active} active)")
     
-    return len(parks)
-
-def create_icom_gps_format():
-    """Convert to Icom GPS format."""
-    
-    print("\n🎯 Converting to Icom ID-52PLUS GPS format...")
-    
-    if not Path('all_pota_parks.csv').exists():
-        print("❌ all_pota_parks.csv not found")
-        return 0
-    
-    # Icom GPS format
-    icom_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
-    processed_count = 0
-    
-    with open('all_pota_parks_icom.csv', 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=icom_header)
-        writer.writeheader()
-        
-        with open('all_pota_parks.csv', 'r', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile)
-            
-            for row in reader:
-                try:
-                    country_code = row['country_code']
-                    park_ref = row['callsign']
-                    park_name = row['name']
-                    lat = row['lat']
-                    lon = row['long']
-                    
-                    # Truncate names for Icom display
-                    name = park_ref[:16]
-                    sub_name = park_name[:16]
-                    
-                    # Determine group number and UTC offset by country
-                    group_no = 75  # Default
-                    group_name = 'POTA-All'
-                    utc_offset = '+1:00'  # Default Central Europe
-                    
-                    if country_code == 'AT':
-                        group_no = 75
-                        group_name = 'POTA-AT'
-                        utc_offset = '+1:00'
-                    elif country_code == 'SK':
-                        group_no = 76
-                        group_name = 'POTA-SK'
-                        utc_offset = '+1:00'
-                    elif country_code == 'SG':
-                        group_no = 77
-                        group_name = 'POTA-SG'
-                        utc_offset = '+8:00'
-                    
-                    icom_row = {
-                        'Group No': group_no,
-                        'Group Name': group_name,
-                        'Name': name,
-                        'Sub Name': sub_name,
-                        'Repeater Call Sign': '',
-                        'Gateway Call Sign': '',
-                        'Frequency': '',  # GPS waypoint
-                        'Dup': '',
-                        'Offset': '',
-                        'Mode': 'GPS',
-                        'TONE': '',
-                        'Repeater Tone': '',
-                        'RPT1USE': '',
-                        'Position': 'Exact',
-                        'Latitude': lat,
-                        'Longitude': lon,
-                        'UTC Offset': utc_offset
-                    }
-                    
-                    writer.writerow(icom_row)
-                    processed_count += 1
-                    
-                except Exception as e:
-                    print(f"Warning: Skipping park due to error: {e}")
-                    continue
-    
-    return processed_count
+    return park_count
 
 def main():
     print("🏞️ All POTA Parks Generator")
@@ -292,10 +233,8 @@ def main():
     park_count = create_all_pota_parks_csv()
     
     if park_count > 0:
-        icom_count = create_icom_gps_format()
-        
         print(f"\n✅ Successfully processed {park_count} POTA parks")
-        print(f"📱 Created {icom_count} GPS waypoints for Icom ID-52PLUS")
+        print(f"📱 Created {park_count} GPS waypoints for Icom ID-52PLUS")
         
         print("\n📁 Generated files:")
         print("- all_pota_parks.csv (memory-channels-processor format)")
@@ -4,39 +4,59 @@ Combined FM and D-STAR Repeaters CSV Creator
 Creates single CSV files per country containing both FM and D-STAR repeaters
 """
 
-import csv
 from pathlib import Path
 
-def create_combined_country_csv(country_name, fm_file, dstar_file, output_file):
-    """Combine FM and D-STAR repeaters for a country into one CSV."""
-    
-    header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
+ICOM_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+# Header line as written by csv.writer, all inputs share it
+HEADER_BYTES = (','.join(ICOM_HEADER) + '\r\n').encode('utf-8')
+
+COPY_CHUNK_SIZE = 1 << 20
+
+def append_csv_rows(input_file, outfile):
+    """Append the data rows of an Icom CSV to an open binary file, return row count."""
+    if not Path(input_file).exists():
+        return 0
     
-    total_count = 0
+    row_count = 0
     
-    with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=header)
-        writer.writeheader()
+    with open(input_file, 'rb', buffering=COPY_CHUNK_SIZE) as infile:
+        # The caller writes HEADER_BYTES once, rows under another header would not line up
+        if infile.readline().rstrip(b'\r\n') != HEADER_BYTES.rstrip(b'\r\n'):
+            print(f"⚠️  Skipping {input_file}: header does not match the Icom repeater columns")
+            return 0
+        
+        line = b'\n'
+        in_quotes = False
         
-        # Add FM repeaters first
-        if Path(fm_file).exists():
-            with open(fm_file, 'r', encoding='utf-8') as infile:
-                reader = csv.DictReader(infile)
-                for row in reader:
-                    writer.writerow(row)
-                    total_count += 1
+        for line in infile:
+            outfile.write(line)
+            
+            # A quoted field can span lines, a row ends on a line that leaves no quote open
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            if not in_quotes and line.rstrip(b'\r\n'):
+                row_count += 1
+    
+    # Terminate a final row that lacks a line ending
+    if not line.endswith(b'\n'):
+        outfile.write(b'\r\n')
+    
+    return row_count
+
+def create_combined_country_csv(country_name, fm_file, dstar_file, output_file):
+    """Combine FM and D-STAR repeaters for a country into one CSV."""
+    
+    with open(output_file, 'wb') as outfile:
+        outfile.write(HEADER_BYTES)
         
-        # Add D-STAR repeaters
-        if Path(dstar_file).exists():
-            with open(dstar_file, 'r', encoding='utf-8') as infile:
-                reader = csv.DictReader(infile)
-                for row in reader:
-                    writer.writerow(row)
-                    total_count += 1
+        # Add FM repeaters first, then D-STAR repeaters
+        total_count = append_csv_rows(fm_file, outfile)
+        total_count += append_csv_rows(dstar_file, outfile)
     
     return total_count
 
@@ -76,23 +96,12 @@ def main():
     # Create master combined file
     print("\n🌍 Creating master combined file...")
     
-    header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
-    with open('all_repeaters_combined.csv', 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=header)
-        writer.writeheader()
+    with open('all_repeaters_combined.csv', 'wb') as outfile:
+        outfile.write(HEADER_BYTES)
         
         # Combine all country files
         for filename in ['austrian_all_repeaters.csv', 'slovak_all_repeaters.csv', 'singapore_all_repeaters.csv']:
-            if Path(filename).exists():
-                with open(filename, 'r', encoding='utf-8') as infile:
-                    reader = csv.DictReader(infile)
-                    for row in reader:
-                        writer.writerow(row)
+            append_csv_rows(filename, outfile)
     
     total_all = austrian_count + slovak_count + singapore_count
     print(f"✅ Master combined file created with {total_all} total repeaters")
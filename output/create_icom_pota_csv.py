@@ -5,49 +5,51 @@ Converts POTA park data to fmexample.csv compatible format
 """
 
 import csv
+import gzip
 import json
-import subprocess
+import urllib.error
+import urllib.request
 from pathlib import Path
 
-def convert_umlauts(text):
-    """Convert umlauts and special characters to ASCII equivalents."""
-    if not text:
-        return text
-    
-    umlaut_map = {
-        'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue',
-        'ß': 'ss', 'é': 'e', 'É': 'E', 'è': 'e', 'È': 'E',
-        'á': 'a', 'Á': 'A', 'à': 'a', 'À': 'A', 'í': 'i', 'Í': 'I',
-        'ì': 'i', 'Ì': 'I', 'ó': 'o', 'Ó': 'O', 'ò': 'o', 'Ò': 'O',
-        'ú': 'u', 'Ú': 'U', 'ù': 'u', 'Ù': 'U', 'ñ': 'n', 'Ñ': 'N',
-        'ç': 'c', 'Ç': 'C', '–': '-', '—': '-', '"': '"', '"': '"',
-        ''': "'", ''': "'", '…': '...', 'ř': 'r', 'Ř': 'R'
-    }
-    
-    result = text
-    for umlaut, replacement in umlaut_map.items():
-        result = result.replace(umlaut, replacement)
-    
-    return result
+from umlauts import convert_umlauts
+
+POTA_SPOTS_URL = 'https://api.pota.app/spot/activator'
+
+ICOM_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+# Columns Repeater Call Sign through Position, identical for every GPS waypoint
+GPS_WAYPOINT_FIELDS = ('', '', '', '', '', 'GPS', '', '', '', 'Exact')
+
+# UTC offset by reference prefix, Central Europe otherwise
+UTC_OFFSETS = {
+    'US': '-5:00', 'CA': '-5:00',  # North America (EST)
+    'AU': '+10:00', 'VK': '+10:00',  # Australia
+    'JP': '+9:00',  # Japan
+    'TH': '+7:00',  # Thailand
+    'CN': '+8:00'  # China
+}
+DEFAULT_UTC_OFFSET = '+1:00'
 
 def fetch_and_convert_pota_parks():
     """Fetch POTA parks and convert to Icom format."""
     
     print("🏞️ Fetching current POTA parks from API...")
     
-    # Fetch current spots using curl
+    # Fetch current spots, parsed straight from the response stream
     try:
-        result = subprocess.run(
-            ['curl', '-s', 'https://api.pota.app/spot/activator'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            print(f"❌ Error fetching POTA data")
-            return 0
-        
-        spots_data = json.loads(result.stdout)
+        request = urllib.request.Request(POTA_SPOTS_URL, headers={'Accept-Encoding': 'gzip'})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            stream = response
+            if response.headers.get('Content-Encoding') == 'gzip':
+                stream = gzip.GzipFile(fileobj=response)
+            spots_data = json.load(stream)
+    except urllib.error.URLError as e:
+        print(f"❌ Error fetching POTA data: {e}")
+        return 0
     except Exception as e:
         print(f"❌ Error processing POTA data: {e}")
         return 0
@@ -68,13 +70,7 @@ def fetch_and_convert_pota_parks():
                 continue
                 
             if ref not in parks:
-                parks[ref] = {
-                    'reference': ref,
-                    'name': name,
-                    'location': location,
-                    'lat': lat,
-                    'lon': lon
-                }
+                parks[ref] = (ref, name, location, lat, lon)
         except:
             continue
     
@@ -83,68 +79,36 @@ def fetch_and_convert_pota_parks():
         return 0
     
     # Convert to Icom format
-    icom_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
     processed_count = 0
     
     with open('pota_parks_icom.csv', 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=icom_header)
-        writer.writeheader()
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_HEADER)
         
-        for park in parks.values():
+        icom_rows = []
+        for ref, park_name, location, lat, lon in parks.values():
             try:
                 # Clean and format names
-                park_ref = convert_umlauts(park['reference'])
-                park_name = convert_umlauts(park['name'])
-                park_location = convert_umlauts(park['location'])
+                park_ref = convert_umlauts(ref)
+                park_name = convert_umlauts(park_name)
+                park_location = convert_umlauts(location)
                 
                 # Truncate names for Icom display
-                name = f"{park_ref}"[:16]
+                name = park_ref[:16]
                 sub_name = park_name[:16] if park_name else park_location[:16]
                 
-                # Determine UTC offset based on reference
-                utc_offset = '+1:00'  # Default Central Europe
-                if park_ref.startswith('US') or park_ref.startswith('CA'):
-                    utc_offset = '-5:00'  # North America (EST)
-                elif park_ref.startswith('AU') or park_ref.startswith('VK'):
-                    utc_offset = '+10:00'  # Australia
-                elif park_ref.startswith('JP'):
-                    utc_offset = '+9:00'  # Japan
-                elif park_ref.startswith('TH'):
-                    utc_offset = '+7:00'  # Thailand
-                elif park_ref.startswith('CN'):
-                    utc_offset = '+8:00'  # China
-                
-                icom_row = {
-                    'Group No': 75,
-                    'Group Name': 'POTA-Parks',
-                    'Name': name,
-                    'Sub Name': sub_name,
-                    'Repeater Call Sign': '',
-                    'Gateway Call Sign': '',
-                    'Frequency': '',  # GPS waypoint
-                    'Dup': '',
-                    'Offset': '',
-                    'Mode': 'GPS',
-                    'TONE': '',
-                    'Repeater Tone': '',
-                    'RPT1USE': '',
-                    'Position': 'Exact',
-                    'Latitude': park['lat'],
-                    'Longitude': park['lon'],
-                    'UTC Offset': utc_offset
-                }
+                utc_offset = UTC_OFFSETS.get(park_ref[:2], DEFAULT_UTC_OFFSET)
                 
-                writer.writerow(icom_row)
+                icom_rows.append(
+                    (75, 'POTA-Parks', name, sub_name) + GPS_WAYPOINT_FIELDS + (lat, lon, utc_offset)
+                )
                 processed_count += 1
                 
             except Exception as e:
                 print(f"Warning: Skipping park due to error: {e}")
                 continue
+        
+        writer.writerows(icom_rows)
     
     return processed_count
 
@@ -5,94 +5,90 @@ Creates Icom ID-52PLUS compatible CSV file for SOTA summits as GPS waypoints
 """
 
 import csv
+import functools
 import sys
 from pathlib import Path
 import unicodedata
 
+from gps_common import UMLAUT_TABLE, read_rows_with_defaults
+
+# 1 MiB file buffers, input files can be several MB
+IO_BUFFER_SIZE = 1 << 20
+
+# Icom CSV header for GPS waypoints
+ICOM_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+# UTC offsets by country code, for summits outside Central Europe
+UTC_OFFSETS = {'SGP': '+8:00'}
+
+# Columns read from the SOTA summits CSV, with the value used when a file lacks one
+SOTA_COLUMN_DEFAULTS = {
+    'lat': '0', 'long': '0', 'callsign': '', 'name': '', 'state': '',
+    'country_code': '', 'sea_level': ''
+}
+
 def convert_umlauts(text):
     """Convert German umlauts and special characters to ASCII equivalents."""
-    if not text:
+    # Most summit names are plain ASCII already, nothing to convert
+    if not text or text.isascii():
         return text
     
-    # German umlaut conversions
-    umlaut_map = {
-        'ä': 'ae', 'Ä': 'Ae',
-        'ö': 'oe', 'Ö': 'Oe', 
-        'ü': 'ue', 'Ü': 'Ue',
-        'ß': 'ss',
-        'é': 'e', 'É': 'E',
-        'è': 'e', 'È': 'E',
-        'á': 'a', 'Á': 'A',
-        'à': 'a', 'À': 'A',
-        'í': 'i', 'Í': 'I',
-        'ì': 'i', 'Ì': 'I',
-        'ó': 'o', 'Ó': 'O',
-        'ò': 'o', 'Ò': 'O',
-        'ú': 'u', 'Ú': 'U',
-        'ù': 'u', 'Ù': 'U',
-        'ñ': 'n', 'Ñ': 'N',
-        'ç': 'c', 'Ç': 'C',
-        '–': '-', '—': '-',
-        '"': '"', '"': '"',
-        ''': "'", ''': "'",
-        'ľ': 'l', 'Ľ': 'L',
-        'ž': 'z', 'Ž': 'Z',
-        'č': 'c', 'Č': 'C',
-        'š': 's', 'Š': 'S',
-        'ý': 'y', 'Ý': 'Y',
-        'ť': 't', 'Ť': 'T',
-        'ň': 'n', 'Ň': 'N',
-        'ď': 'd', 'Ď': 'D',
-        'ř': 'r', 'Ř': 'R',
-        '…': '...'
-    }
-    
-    # Apply umlaut conversions
-    result = text
-    for umlaut, replacement in umlaut_map.items():
-        result = result.replace(umlaut, replacement)
+    # Apply umlaut conversions in a single pass
+    result = text.translate(UMLAUT_TABLE)
     
-    # Remove any remaining non-ASCII characters
-    result = unicodedata.normalize('NFD', result)
-    result = ''.join(char for char in result if ord(char) < 128)
-    
-    return result
+    # Remove any remaining non-ASCII characters, accented letters keep their base letter
+    return unicodedata.normalize('NFD', result).encode('ascii', 'ignore').decode('ascii')
+
+# Summit heights repeat across a region, format each distinct value once
+@functools.lru_cache(maxsize=None)
+def format_elevation(elevation):
+    """Format an elevation text as whole meters like '1445m', None if it is not a number."""
+    try:
+        return f"{int(float(elevation))}m"
+    except (ValueError, OverflowError):
+        return None
 
 def convert_sota_to_icom_format(input_file, output_file, group_number, group_name):
     """Convert SOTA summits to Icom GPS format."""
     
-    # Icom CSV header for GPS waypoints
-    icom_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
     processed_count = 0
     
-    with open(input_file, 'r', encoding='utf-8') as infile, \
-         open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+    with open(input_file, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as infile, \
+         open(output_file, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as outfile:
         
-        reader = csv.DictReader(infile)
-        writer = csv.DictWriter(outfile, fieldnames=icom_header)
-        writer.writeheader()
+        index, rows = read_rows_with_defaults(csv.reader(infile), SOTA_COLUMN_DEFAULTS)
         
-        for row in reader:
+        lat_idx = index['lat']
+        long_idx = index['long']
+        callsign_idx = index['callsign']
+        name_idx = index['name']
+        state_idx = index['state']
+        country_code_idx = index['country_code']
+        sea_level_idx = index['sea_level']
+        
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_HEADER)
+        
+        for row in rows:
             try:
                 # Get coordinates
-                lat = float(row.get('lat', 0))
-                lon = float(row.get('long', 0))
+                lat = float(row[lat_idx])
+                lon = float(row[long_idx])
                 
                 # Skip entries without valid coordinates
                 if lat == 0 or lon == 0:
                     continue
                 
                 # Get summit info
-                callsign = row.get('callsign', '').strip()
-                summit_name = row.get('name', '').strip()
-                state = row.get('state', '').strip()
-                country_code = row.get('country_code', '').strip()
-                elevation = row.get('sea_level', '').strip()
+                callsign = row[callsign_idx].strip()
+                summit_name = row[name_idx].strip()
+                state = row[state_idx].strip()
+                country_code = row[country_code_idx].strip()
+                elevation = row[sea_level_idx].strip()
                 
                 # Format name - use SOTA callsign as primary identifier
                 if not callsign:
@@ -107,11 +103,9 @@ def convert_sota_to_icom_format(input_file, output_file, group_number, group_nam
                 if state:
                     sub_parts.append(convert_umlauts(state[:8]))  # Limit state name length
                 if elevation:
-                    try:
-                        elev_m = int(float(elevation))
-                        sub_parts.append(f"{elev_m}m")
-                    except:
-                        pass
+                    elevation_text = format_elevation(elevation)
+                    if elevation_text:
+                        sub_parts.append(elevation_text)
                 
                 sub_name = " ".join(sub_parts) if sub_parts else country_code
                 
@@ -120,32 +114,16 @@ def convert_sota_to_icom_format(input_file, output_file, group_number, group_nam
                 sub_name = convert_umlauts(sub_name)
                 
                 # Determine UTC offset based on country
-                utc_offset = '+1:00'  # Central Europe default
-                if country_code == 'SGP':
-                    utc_offset = '+8:00'
-                
-                # Create Icom GPS waypoint row
-                icom_row = {
-                    'Group No': group_number,
-                    'Group Name': group_name,
-                    'Name': name[:16],  # Limit name length for Icom display
-                    'Sub Name': sub_name[:16],  # Limit sub name length
-                    'Repeater Call Sign': '',
-                    'Gateway Call Sign': '',
-                    'Frequency': '',  # GPS waypoint - no frequency
-                    'Dup': '',
-                    'Offset': '',
-                    'Mode': 'GPS',  # GPS waypoint mode
-                    'TONE': '',
-                    'Repeater Tone': '',
-                    'RPT1USE': '',
-                    'Position': 'Exact',  # SOTA coordinates are precise
-                    'Latitude': lat,
-                    'Longitude': lon,
-                    'UTC Offset': utc_offset
-                }
+                utc_offset = UTC_OFFSETS.get(country_code, '+1:00')  # Central Europe default
                 
-                writer.writerow(icom_row)
+                # Create Icom GPS waypoint row, same column order as ICOM_HEADER
+                # GPS waypoint mode without frequency, SOTA coordinates are precise,
+                # name and sub name limited to 16 characters for the Icom display
+                writer.writerow((
+                    group_number, group_name, name[:16], sub_name[:16], '', '',
+                    '', '', '', 'GPS', '', '', '', 'Exact',
+                    lat, lon, utc_offset
+                ))
                 processed_count += 1
                 
             except (ValueError, KeyError, TypeError) as e:
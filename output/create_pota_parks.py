@@ -4,28 +4,50 @@ POTA Parks Generator for memory-channels-processor
 Creates CSV data for POTA parks using the publicly available POTA API
 """
 
-import json
 import csv
-import subprocess
 import time
 from pathlib import Path
 import sys
 
+from gps_common import SESSION, json_loads, wait_for_request_slot
+
+if SESSION is None:
+    print("Warning: requests module not available. POTA functionality will be limited.")
+    print("Install with: apt install python3-requests")
+
+# Country names by reference prefix
+COUNTRY_MAP = {
+    'US': 'United States', 'CA': 'Canada', 'AU': 'Australia',
+    'JP': 'Japan', 'DE': 'Germany', 'UK': 'United Kingdom',
+    'VK': 'Australia', 'VE': 'Canada', 'BY': 'Belarus',
+    'TH': 'Thailand', 'CN': 'China', 'OE': 'Austria',
+    'OK': 'Czech Republic', 'OM': 'Slovakia'
+}
+
+# CSV header matching memory-channels-processor format
+PARK_FIELDNAMES = [
+    'callsign', 'name', 'band', 'freq_tx', 'freq_rx', 'ctcss_tx', 'ctcss_rx',
+    'c4fm', 'dmr', 'dmr_id', 'dmr_cc', 'dstar', 'dstar_rpt1', 'dstar_rpt2',
+    'fm', 'landmark', 'state', 'country', 'country_code', 'loc_exact',
+    'lat', 'long', 'locator', 'sea_level', 'skip', 'scan_group',
+    'source_id', 'source_name', 'source_provider', 'source_type',
+    'source_license', 'source_url', 'offset', 'dup', 'ctcss',
+    'simplex', 'split', 'multimode', 'name_formatted', 'distance', 'heading'
+]
+
 def fetch_pota_spots():
-    """Fetch current POTA spots to collect park data using curl."""
+    """Fetch current POTA spots to collect park data."""
+    if SESSION is None:
+        print("❌ Error: requests module not available for POTA API access")
+        return []
+    
+    # Spots change by the minute, so they bypass the on-disk API cache
     try:
-        result = subprocess.run(
-            ['curl', '-s', 'https://api.pota.app/spot/activator'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode == 0:
-            return json.loads(result.stdout)
-        else:
-            print(f"Error fetching POTA data: {result.stderr}")
-            return []
-    except (subprocess.TimeoutExpired, json.JSONDecodeError, Exception) as e:
+        wait_for_request_slot()
+        response = SESSION.get('https://api.pota.app/spot/activator', timeout=30)
+        response.raise_for_status()
+        return json_loads(response.content)
+    except Exception as e:
         print(f"Error fetching POTA data: {e}")
         return []
 
@@ -42,107 +64,70 @@ def create_pota_parks_csv(output_file='pota_parks.csv'):
     
     print(f"📡 Retrieved {len(spots_data)} active POTA spots")
     
-    # Extract unique parks from spots
-    parks = {}
-    for spot in spots_data:
-        try:
-            ref = spot.get('reference', '')
-            name = spot.get('name', '')
-            location = spot.get('locationDesc', '')
-            lat = spot.get('latitude', 0)
-            lon = spot.get('longitude', 0)
-            grid4 = spot.get('grid4', '')
-            grid6 = spot.get('grid6', '')
-            
-            # Skip invalid entries
-            if not ref or not name or lat == 0 or lon == 0:
-                continue
-            
-            # Use reference as key to avoid duplicates
-            if ref not in parks:
+    # Write unique parks straight to the CSV, only references stay in memory. The
+    # rows go to a temporary file so an empty run keeps the previous output
+    output_part = Path(output_file + '.part')
+    seen = set()
+    with open(output_part, 'w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(PARK_FIELDNAMES)
+        
+        # Bound methods looked up once, not per spot
+        write = writer.writerow
+        seen_add = seen.add
+        
+        for spot in spots_data:
+            try:
+                get = spot.get
+                ref = get('reference') or ''
+                name = get('name') or ''
+                lat = get('latitude')
+                lon = get('longitude')
+                
+                # Skip invalid entries
+                if not ref or not name or not lat or not lon:
+                    continue
+                
+                # Use reference to avoid duplicates
+                if ref in seen:
+                    continue
+                
+                location = get('locationDesc') or ''
+                grid4 = get('grid4') or ''
+                grid6 = get('grid6') or ''
+                
                 # Determine country from reference
-                country_code = ref.split('-')[0] if '-' in ref else 'Unknown'
-                country_map = {
-                    'US': 'United States', 'CA': 'Canada', 'AU': 'Australia',
-                    'JP': 'Japan', 'DE': 'Germany', 'UK': 'United Kingdom',
-                    'VK': 'Australia', 'VE': 'Canada', 'BY': 'Belarus',
-                    'TH': 'Thailand', 'CN': 'China', 'OE': 'Austria',
-                    'OK': 'Czech Republic', 'OM': 'Slovakia'
-                }
-                country = country_map.get(country_code, country_code)
+                country_code, dash, _ = ref.partition('-')
+                if not dash:
+                    country_code = 'Unknown'
+                country = COUNTRY_MAP.get(country_code, country_code)
                 
-                parks[ref] = {
-                    'callsign': ref,
-                    'name': name,
-                    'band': 'gps',
-                    'freq_tx': '',
-                    'freq_rx': '',
-                    'ctcss_tx': '',
-                    'ctcss_rx': '',
-                    'c4fm': 'False',
-                    'dmr': 'False',
-                    'dmr_id': '',
-                    'dmr_cc': '',
-                    'dstar': 'False',
-                    'dstar_rpt1': '',
-                    'dstar_rpt2': '',
-                    'fm': 'False',
-                    'landmark': location,
-                    'state': location.split(',')[0] if ',' in location else location,
-                    'country': country,
-                    'country_code': country_code,
-                    'loc_exact': 'True',
-                    'lat': lat,
-                    'long': lon,
-                    'locator': grid6 if grid6 else grid4,
-                    'sea_level': '',
-                    'skip': 'False',
-                    'scan_group': '',
-                    'source_id': 'pota-parks',
-                    'source_name': 'POTA Parks',
-                    'source_provider': 'Parks on the Air',
-                    'source_type': 'dynamic',
-                    'source_license': '',
-                    'source_url': 'https://pota.app/',
-                    'offset': '0',
-                    'dup': '',
-                    'ctcss': 'False',
-                    'simplex': 'True',
-                    'split': 'False',
-                    'multimode': 'False',
-                    'name_formatted': f"{ref} {name}",
-                    'distance': '',
-                    'heading': ''
-                }
-        except Exception as e:
-            print(f"Warning: Error processing spot: {e}")
-            continue
+                # Same column order as PARK_FIELDNAMES
+                write((
+                    ref, name, 'gps', '', '', '', '',
+                    'False', 'False', '', '', 'False', '', '',
+                    'False', location, location.partition(',')[0],
+                    country, country_code, 'True',
+                    lat, lon, grid6 if grid6 else grid4, '', 'False', '',
+                    'pota-parks', 'POTA Parks', 'Parks on the Air', 'dynamic',
+                    '', 'https://pota.app/', '0', '', 'False',
+                    'True', 'False', 'False', f"{ref} {name}", '', ''
+                ))
+                seen_add(ref)
+            except Exception as e:
+                print(f"Warning: Error processing spot: {e}")
+                continue
     
-    # Write CSV file in memory-channels-processor format
-    if not parks:
+    park_count = len(seen)
+    if not park_count:
+        output_part.unlink()
         print("❌ No valid parks found")
         return 0
     
-    # CSV header matching memory-channels-processor format
-    fieldnames = [
-        'callsign', 'name', 'band', 'freq_tx', 'freq_rx', 'ctcss_tx', 'ctcss_rx',
-        'c4fm', 'dmr', 'dmr_id', 'dmr_cc', 'dstar', 'dstar_rpt1', 'dstar_rpt2',
-        'fm', 'landmark', 'state', 'country', 'country_code', 'loc_exact',
-        'lat', 'long', 'locator', 'sea_level', 'skip', 'scan_group',
-        'source_id', 'source_name', 'source_provider', 'source_type',
-        'source_license', 'source_url', 'offset', 'dup', 'ctcss',
-        'simplex', 'split', 'multimode', 'name_formatted', 'distance', 'heading'
-    ]
-    
-    with open(output_file, 'w', encoding='utf-8', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for park_data in parks.values():
-            writer.writerow(park_data)
+    output_part.replace(output_file)
     
-    print(f"✅ Created {len(parks)} POTA parks in {output_file}")
-    return len(parks)
+    print(f"✅ Created {park_count} POTA parks in {output_file}")
+    return park_count
 
 def main():
     print("🏞️ POTA Parks Generator for memory-channels-processor")
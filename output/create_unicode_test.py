@@ -7,6 +7,34 @@ Tests different Unicode encoding approaches for German umlauts
 import csv
 from pathlib import Path
 
+# Standard Icom format
+ICOM_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+def to_latin1(text):
+    """Keep only characters that exist in Latin-1."""
+    return text.replace('\u0308', '').replace(' NFD', ' Latin1')  # Remove combining diaeresis
+
+def build_rows(test_data, group_no, group_name, freq_delta, lat_base, lon_base, label=None, transform=None):
+    """Build Icom rows for the test data, labelled with the encoding under test."""
+    rows = []
+    for i, test in enumerate(test_data):
+        name = test['name']
+        sub_name = test['sub_name']
+        if transform:
+            name = transform(name)
+            sub_name = transform(sub_name)
+        
+        rows.append((
+            group_no, group_name, name, f"{sub_name} ({label or test['encoding']})", '', '',
+            test['frequency'] + freq_delta, '', 0.0, 'FM', 'OFF', '88.5Hz', 'NO', 'Exact',
+            lat_base + (i * 0.1), lon_base + (i * 0.1), '+1:00'
+        ))
+    return rows
+
 def create_unicode_test_csv():
     """Create a test CSV with various Unicode encoding approaches."""
     
@@ -50,98 +78,24 @@ def create_unicode_test_csv():
         }
     ]
     
-    # Create test CSV in standard Icom format
-    header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
     # Create UTF-8 encoded file (default)
     with open('unicode_umlaut_test_utf8.csv', 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=header)
-        writer.writeheader()
-        
-        for i, test in enumerate(test_data):
-            row = {
-                'Group No': 90,
-                'Group Name': 'Unicode-Test',
-                'Name': test['name'],
-                'Sub Name': f"{test['sub_name']} ({test['encoding']})",
-                'Repeater Call Sign': '',
-                'Gateway Call Sign': '',
-                'Frequency': test['frequency'],
-                'Dup': '',
-                'Offset': 0.0,
-                'Mode': 'FM',
-                'TONE': 'OFF',
-                'Repeater Tone': '88.5Hz',
-                'RPT1USE': 'NO',
-                'Position': 'Exact',
-                'Latitude': 48.2 + (i * 0.1),
-                'Longitude': 16.4 + (i * 0.1),
-                'UTC Offset': '+1:00'
-            }
-            writer.writerow(row)
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_HEADER)
+        writer.writerows(build_rows(test_data, 90, 'Unicode-Test', 0.0, 48.2, 16.4))
     
     # Create UTF-16 encoded file (alternative encoding)
     with open('unicode_umlaut_test_utf16.csv', 'w', encoding='utf-16', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=header)
-        writer.writeheader()
-        
-        for i, test in enumerate(test_data):
-            row = {
-                'Group No': 91,
-                'Group Name': 'Unicode-UTF16',
-                'Name': test['name'],
-                'Sub Name': f"{test['sub_name']} (UTF-16)",
-                'Repeater Call Sign': '',
-                'Gateway Call Sign': '',
-                'Frequency': test['frequency'] + 1.0,
-                'Dup': '',
-                'Offset': 0.0,
-                'Mode': 'FM',
-                'TONE': 'OFF',
-                'Repeater Tone': '88.5Hz',
-                'RPT1USE': 'NO',
-                'Position': 'Exact',
-                'Latitude': 48.3 + (i * 0.1),
-                'Longitude': 16.5 + (i * 0.1),
-                'UTC Offset': '+1:00'
-            }
-            writer.writerow(row)
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_HEADER)
+        writer.writerows(build_rows(test_data, 91, 'Unicode-UTF16', 1.0, 48.3, 16.5, 'UTF-16'))
     
     # Create ISO-8859-1 (Latin-1) encoded file
     try:
         with open('unicode_umlaut_test_latin1.csv', 'w', encoding='iso-8859-1', newline='') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=header)
-            writer.writeheader()
-            
-            for i, test in enumerate(test_data):
-                # Only include characters that exist in Latin-1
-                name = test['name'].replace('\u0308', '')  # Remove combining diaeresis
-                sub_name = test['sub_name'].replace('\u0308', '').replace(' NFD', ' Latin1')
-                
-                row = {
-                    'Group No': 92,
-                    'Group Name': 'Unicode-Latin1',
-                    'Name': name,
-                    'Sub Name': f"{sub_name} (Latin-1)",
-                    'Repeater Call Sign': '',
-                    'Gateway Call Sign': '',
-                    'Frequency': test['frequency'] + 2.0,
-                    'Dup': '',
-                    'Offset': 0.0,
-                    'Mode': 'FM',
-                    'TONE': 'OFF',
-                    'Repeater Tone': '88.5Hz',
-                    'RPT1USE': 'NO',
-                    'Position': 'Exact',
-                    'Latitude': 48.4 + (i * 0.1),
-                    'Longitude': 16.6 + (i * 0.1),
-                    'UTC Offset': '+1:00'
-                }
-                writer.writerow(row)
+            writer = csv.writer(outfile)
+            writer.writerow(ICOM_HEADER)
+            writer.writerows(build_rows(test_data, 92, 'Unicode-Latin1', 2.0, 48.4, 16.6, 'Latin-1', to_latin1))
     except UnicodeEncodeError:
         print("⚠️ Some characters cannot be encoded in Latin-1")
     
@@ -5,42 +5,84 @@ Keeps only 2m (144-146 MHz), 70cm (430-440 MHz), and 23cm (1240-1300 MHz) bands
 """
 
 import csv
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# 1 MiB file buffers and rows per writerows call
+IO_BUFFER_SIZE = 1 << 20
+WRITE_BATCH_SIZE = 4096
+
+def in_amateur_band(frequency):
+    """Check if a frequency in MHz is in the 2m, 70cm, 23cm or 13cm band."""
+    return (144 <= frequency <= 146) or \
+           (430 <= frequency <= 440) or \
+           (1240 <= frequency <= 1300) or \
+           (2300 <= frequency <= 2450)
+
+# Repeater lists reuse a small set of channel frequencies, parse and check each text once
+@functools.lru_cache(maxsize=None)
+def field_in_amateur_band(text):
+    """Check if the text of a Frequency field in MHz is in the 2m, 70cm, 23cm or 13cm band."""
+    return in_amateur_band(float(text))
+
+def tee_lines(lines, record_lines):
+    """Yield lines while collecting them, so the source text of a record stays available."""
+    for line in lines:
+        record_lines.append(line)
+        yield line
+
 def filter_amateur_bands(input_file, output_file):
     """Filter CSV to keep only standard amateur radio bands."""
     
     kept_count = 0
     filtered_count = 0
     
-    with open(input_file, 'r', encoding='utf-8') as infile, \
-         open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+    with open(input_file, 'r', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as infile, \
+         open(output_file, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as outfile:
         
-        reader = csv.DictReader(infile)
-        writer = csv.DictWriter(outfile, fieldnames=reader.fieldnames)
-        writer.writeheader()
+        # Only the Frequency field is parsed, kept records are copied through
+        # as their source lines instead of being serialized again
+        record_lines = []
+        reader = csv.reader(tee_lines(infile, record_lines))
+        header = next(reader, [])
+        outfile.writelines(record_lines)
+        record_lines.clear()
+        
+        if 'Frequency' not in header:
+            print(f"Warning: No Frequency column in {input_file}")
+            return kept_count, filtered_count
+        freq_idx = header.index('Frequency')
+        kept_lines = []
         
         for row in reader:
             try:
-                frequency = float(row['Frequency'])
-                
                 # Check if frequency is in standard amateur bands
-                if (144 <= frequency <= 146) or \
-                   (430 <= frequency <= 440) or \
-                   (1240 <= frequency <= 1300) or \
-                   (2300 <= frequency <= 2450):
-                    writer.writerow(row)
+                if field_in_amateur_band(row[freq_idx]):
+                    kept_lines.extend(record_lines)
                     kept_count += 1
+                    if len(kept_lines) >= WRITE_BATCH_SIZE:
+                        outfile.writelines(kept_lines)
+                        kept_lines.clear()
                 else:
-                    print(f"Filtered out: {frequency} MHz ({row.get('Repeater Call Sign', 'Unknown')})")
                     filtered_count += 1
                 
-            except (ValueError, KeyError) as e:
+            except (ValueError, IndexError) as e:
                 print(f"Warning: Skipping row due to error: {e}")
-                continue
+            
+            record_lines.clear()
+        
+        outfile.writelines(kept_lines)
     
     return kept_count, filtered_count
 
+def filter_file(filename):
+    """Filter one CSV file into its _filtered.csv counterpart."""
+    output_filename = filename.replace('.csv', '_filtered.csv')
+    kept_count, filtered_count = filter_amateur_bands(filename, output_filename)
+    return output_filename, kept_count, filtered_count
+
 def main():
     print("📡 Filtering CSV files for standard amateur radio bands...")
     
@@ -54,19 +96,25 @@ def main():
     total_kept = 0
     total_filtered = 0
     
+    found_files = []
     for filename in files_to_filter:
         if Path(filename).exists():
-            print(f"\n📻 Processing {filename}...")
-            output_filename = filename.replace('.csv', '_filtered.csv')
-            
-            kept_count, filtered_count = filter_amateur_bands(filename, output_filename)
-            total_kept += kept_count
-            total_filtered += filtered_count
-            
-            print(f"✅ Kept: {kept_count}, Filtered: {filtered_count} -> {output_filename}")
+            print(f"📻 Processing {filename}...")
+            found_files.append(filename)
         else:
             print(f"⚠️ File not found: {filename}")
     
+    # Files are independent, filter them in parallel processes
+    results = []
+    if found_files:
+        with ProcessPoolExecutor(max_workers=min(len(found_files), os.cpu_count() or 1)) as executor:
+            results = list(executor.map(filter_file, found_files))
+    
+    for filename, (output_filename, kept_count, filtered_count) in zip(found_files, results):
+        total_kept += kept_count
+        total_filtered += filtered_count
+        print(f"\n✅ {filename}: Kept: {kept_count}, Filtered: {filtered_count} -> {output_filename}")
+    
     print(f"\n🎯 Total kept: {total_kept}, Total filtered: {total_filtered}")
     print("✅ All CSV files filtered for standard VHF/UHF amateur bands!")
     print("\n📋 Standard bands kept:")
@@ -5,71 +5,124 @@ Corrects frequencies that are outside amateur radio bands
 """
 
 import csv
+import functools
+import os
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# 1 MiB file buffers and rows per writerows call
+IO_BUFFER_SIZE = 1 << 20
+WRITE_BATCH_SIZE = 4096
+
+# Repeater lists reuse a small set of channel frequencies, fix each value once
+@functools.lru_cache(maxsize=None)
+def fix_frequency(frequency):
+    """Move a frequency that is outside the amateur bands into the most likely band."""
+    # Fix common frequency issues
+    if 50 <= frequency <= 54:  # 6m band converted to 2m
+        frequency = frequency + 94  # Convert 6m to 2m (50MHz -> 144MHz)
+    elif 28 <= frequency <= 29.7:  # 10m band converted to 2m  
+        frequency = frequency + 116  # Convert 10m to 2m (28MHz -> 144MHz)
+    elif frequency < 144:  # Other low frequencies
+        if frequency > 50:
+            frequency = frequency + 94  # Assume 6m conversion
+        else:
+            frequency = 145.0  # Default to 145.0 MHz
+    
+    # Ensure frequencies are within amateur bands
+    if 144 <= frequency <= 146:  # 2m band - OK
+        pass
+    elif 430 <= frequency <= 440:  # 70cm band - OK
+        pass
+    elif 1240 <= frequency <= 1300:  # 23cm band - OK
+        pass
+    elif 2300 <= frequency <= 2450:  # 13cm band - OK
+        pass
+    elif frequency > 2000:  # High frequency, likely correct
+        pass
+    else:
+        # Try to guess correct band
+        if frequency < 200:
+            frequency = 145.0  # Default to 2m
+        elif 400 <= frequency <= 500:
+            pass  # Likely 70cm, keep as is
+        else:
+            frequency = 145.0  # Default fallback
+    
+    return frequency
+
+@functools.lru_cache(maxsize=None)
+def fix_frequency_field(text):
+    """Parse a Frequency field, return the original and the fixed frequency in MHz."""
+    frequency = float(text)
+    return frequency, fix_frequency(frequency)
+
 def fix_frequency_bands(input_file, output_file):
     """Fix frequency band issues in CSV files."""
     
     fixed_count = 0
     
-    with open(input_file, 'r', encoding='utf-8') as infile, \
-         open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+    with open(input_file, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as infile, \
+         open(output_file, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as outfile:
+        
+        # Rows pass through as lists, only the Frequency column is rewritten
+        reader = csv.reader(infile)
+        writer = csv.writer(outfile)
+        header = next(reader, [])
+        writer.writerow(header)
         
-        reader = csv.DictReader(infile)
-        writer = csv.DictWriter(outfile, fieldnames=reader.fieldnames)
-        writer.writeheader()
+        if 'Frequency' not in header:
+            print(f"Warning: No Frequency column in {input_file}, copying rows unchanged")
+            writer.writerows(reader)
+            return fixed_count
+        freq_idx = header.index('Frequency')
+        call_idx = header.index('Repeater Call Sign') if 'Repeater Call Sign' in header else None
+        batch = []
         
         for row in reader:
             try:
-                frequency = float(row['Frequency'])
-                original_freq = frequency
-                
-                # Fix common frequency issues
-                if 50 <= frequency <= 54:  # 6m band converted to 2m
-                    frequency = frequency + 94  # Convert 6m to 2m (50MHz -> 144MHz)
-                elif 28 <= frequency <= 29.7:  # 10m band converted to 2m  
-                    frequency = frequency + 116  # Convert 10m to 2m (28MHz -> 144MHz)
-                elif frequency < 144:  # Other low frequencies
-                    if frequency > 50:
-                        frequency = frequency + 94  # Assume 6m conversion
-                    else:
-                        frequency = 145.0  # Default to 145.0 MHz
-                
-                # Ensure frequencies are within amateur bands
-                if 144 <= frequency <= 146:  # 2m band - OK
-                    pass
-                elif 430 <= frequency <= 440:  # 70cm band - OK
-                    pass
-                elif 1240 <= frequency <= 1300:  # 23cm band - OK
-                    pass
-                elif 2300 <= frequency <= 2450:  # 13cm band - OK
-                    pass
-                elif frequency > 2000:  # High frequency, likely correct
-                    pass
-                else:
-                    # Try to guess correct band
-                    if frequency < 200:
-                        frequency = 145.0  # Default to 2m
-                    elif 400 <= frequency <= 500:
-                        pass  # Likely 70cm, keep as is
-                    else:
-                        frequency = 145.0  # Default fallback
+                original_freq, frequency = fix_frequency_field(row[freq_idx])
                 
                 if original_freq != frequency:
-                    print(f"Fixed frequency: {original_freq} MHz -> {frequency} MHz ({row.get('Repeater Call Sign', 'Unknown')})")
+                    callsign = row[call_idx] if call_idx is not None else 'Unknown'
+                    print(f"Fixed frequency: {original_freq} MHz -> {frequency} MHz ({callsign})")
                     fixed_count += 1
                 
-                row['Frequency'] = frequency
-                writer.writerow(row)
+                row[freq_idx] = frequency
                 
-            except (ValueError, KeyError) as e:
+            except (ValueError, IndexError) as e:
                 print(f"Warning: Skipping row due to error: {e}")
-                writer.writerow(row)
-                continue
+            
+            batch.append(row)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                writer.writerows(batch)
+                batch.clear()
+        
+        writer.writerows(batch)
     
     return fixed_count
 
+def backup_file(filename):
+    """Keep the original CSV as filename.backup, return the backup path."""
+    backup = f"{filename}.backup"
+    
+    # Remove the old backup first, a hard-linked backup from an earlier version
+    # of this script shares its data with the original and must not be copied into
+    Path(backup).unlink(missing_ok=True)
+    shutil.copy2(filename, backup)
+    
+    return backup
+
+def fix_file(filename):
+    """Back up one CSV file and write its frequency-fixed .fixed copy."""
+    # Create backup
+    backup_file(filename)
+    
+    temp_file = f"{filename}.fixed"
+    return fix_frequency_bands(filename, temp_file)
+
 def main():
     print("🔧 Fixing frequency band issues...")
     
@@ -82,22 +135,24 @@ def main():
     
     total_fixed = 0
     
+    found_files = []
     for filename in files_to_fix:
         if Path(filename).exists():
-            print(f"\n📡 Processing {filename}...")
-            backup_file = f"{filename}.backup"
-            
-            # Create backup
-            import shutil
-            shutil.copy2(filename, backup_file)
-            
-            temp_file = f"{filename}.fixed"
-            fixed_count = fix_frequency_bands(filename, temp_file)
-            total_fixed += fixed_count
-            print(f"✅ Fixed {fixed_count} frequencies in {filename}")
+            print(f"📡 Processing {filename}...")
+            found_files.append(filename)
         else:
             print(f"⚠️ File not found: {filename}")
     
+    # Files are independent, fix them in parallel processes
+    results = []
+    if found_files:
+        with ProcessPoolExecutor(max_workers=min(len(found_files), os.cpu_count() or 1)) as executor:
+            results = list(executor.map(fix_file, found_files))
+    
+    for filename, fixed_count in zip(found_files, results):
+        total_fixed += fixed_count
+        print(f"\n✅ Fixed {fixed_count} frequencies in {filename}")
+    
     print(f"\n🎯 Total frequencies fixed: {total_fixed}")
     print("✅ All CSV files have been corrected for proper amateur radio bands!")
 
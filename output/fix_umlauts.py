@@ -5,79 +5,76 @@ Converts German umlauts and special characters to ASCII equivalents
 """
 
 import csv
+import functools
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import unicodedata
 
+from umlauts import UMLAUT_TABLE
+
+# 1 MiB file buffers and rows per writerows call
+IO_BUFFER_SIZE = 1 << 20
+WRITE_BATCH_SIZE = 4096
+
+# Group and repeater names repeat across rows, convert each distinct value once
+@functools.lru_cache(maxsize=None)
 def convert_umlauts(text):
     """Convert German umlauts and special characters to ASCII equivalents."""
-    if not text:
+    # Callsigns and most names are plain ASCII already, nothing to convert
+    if not text or text.isascii():
         return text
     
-    # German umlaut conversions
-    umlaut_map = {
-        'ä': 'ae', 'Ä': 'Ae',
-        'ö': 'oe', 'Ö': 'Oe', 
-        'ü': 'ue', 'Ü': 'Ue',
-        'ß': 'ss',
-        'é': 'e', 'É': 'E',
-        'è': 'e', 'È': 'E',
-        'á': 'a', 'Á': 'A',
-        'à': 'a', 'À': 'A',
-        'í': 'i', 'Í': 'I',
-        'ì': 'i', 'Ì': 'I',
-        'ó': 'o', 'Ó': 'O',
-        'ò': 'o', 'Ò': 'O',
-        'ú': 'u', 'Ú': 'U',
-        'ù': 'u', 'Ù': 'U',
-        'ñ': 'n', 'Ñ': 'N',
-        'ç': 'c', 'Ç': 'C',
-        '–': '-', '—': '-',
-        '"': '"', '"': '"',
-        ''': "'", ''': "'",
-        '…': '...'
-    }
-    
-    # Apply umlaut conversions
-    result = text
-    for umlaut, replacement in umlaut_map.items():
-        result = result.replace(umlaut, replacement)
+    # Apply umlaut conversions in a single pass
+    result = text.translate(UMLAUT_TABLE)
     
-    # Remove any remaining non-ASCII characters
-    result = unicodedata.normalize('NFD', result)
-    result = ''.join(char for char in result if ord(char) < 128)
-    
-    return result
+    # Remove any remaining non-ASCII characters, accented letters keep their base letter
+    return unicodedata.normalize('NFD', result).encode('ascii', 'ignore').decode('ascii')
 
 def fix_csv_umlauts(input_file, output_file):
     """Fix umlauts in all text fields of a CSV file."""
     
     fixed_count = 0
     
-    with open(input_file, 'r', encoding='utf-8') as infile, \
-         open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+    with open(input_file, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as infile, \
+         open(output_file, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as outfile:
+        
+        # Rows pass through as lists, only the text columns are rewritten
+        reader = csv.reader(infile)
+        writer = csv.writer(outfile)
+        header = next(reader, [])
+        writer.writerow(header)
         
-        reader = csv.DictReader(infile)
-        writer = csv.DictWriter(outfile, fieldnames=reader.fieldnames)
-        writer.writeheader()
+        # Text fields present in this file
+        text_idxs = [header.index(field) for field in ('Name', 'Sub Name', 'Group Name') if field in header]
+        batch = []
         
         for row in reader:
-            original_row = dict(row)
-            
             # Fix umlauts in text fields
-            for field in ['Name', 'Sub Name', 'Group Name']:
-                if field in row and row[field]:
-                    original_text = row[field]
+            for i in text_idxs:
+                original_text = row[i]
+                if original_text:
                     fixed_text = convert_umlauts(original_text)
                     if original_text != fixed_text:
                         print(f"Fixed: '{original_text}' -> '{fixed_text}'")
                         fixed_count += 1
-                    row[field] = fixed_text
+                    row[i] = fixed_text
             
-            writer.writerow(row)
+            batch.append(row)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                writer.writerows(batch)
+                batch.clear()
+        
+        writer.writerows(batch)
     
     return fixed_count
 
+def fix_file(filename):
+    """Write the ASCII-converted _ascii.csv counterpart of one CSV file."""
+    output_filename = filename.replace('.csv', '_ascii.csv')
+    return output_filename, fix_csv_umlauts(filename, output_filename)
+
 def main():
     print("🔧 Fixing umlaut display issues for Icom ID-52PLUS...")
     
@@ -92,18 +89,24 @@ def main():
     
     total_fixed = 0
     
+    found_files = []
     for filename in files_to_fix:
         if Path(filename).exists():
-            print(f"\n📝 Processing {filename}...")
-            output_filename = filename.replace('.csv', '_ascii.csv')
-            
-            fixed_count = fix_csv_umlauts(filename, output_filename)
-            total_fixed += fixed_count
-            
-            print(f"✅ Fixed {fixed_count} umlauts -> {output_filename}")
+            print(f"📝 Processing {filename}...")
+            found_files.append(filename)
         else:
             print(f"⚠️ File not found: {filename}")
     
+    # Files are independent, convert them in parallel processes
+    results = []
+    if found_files:
+        with ProcessPoolExecutor(max_workers=min(len(found_files), os.cpu_count() or 1)) as executor:
+            results = list(executor.map(fix_file, found_files))
+    
+    for filename, (output_filename, fixed_count) in zip(found_files, results):
+        total_fixed += fixed_count
+        print(f"\n✅ {filename}: Fixed {fixed_count} umlauts -> {output_filename}")
+    
     print(f"\n🎯 Total umlauts fixed: {total_fixed}")
     print("✅ All CSV files converted to ASCII-compatible format!")
     print("\n📋 Umlaut Conversions Applied:")
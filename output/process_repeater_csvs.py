@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Filter, fix and ASCII-convert repeater CSV files in a single pass
+Writes the same files as filter_bands.py, fix_frequency_bands.py and fix_umlauts.py
+while reading and parsing each source CSV only once
+"""
+
+import csv
+from pathlib import Path
+
+from filter_bands import in_amateur_band
+from fix_frequency_bands import backup_file, fix_frequency_field
+from fix_umlauts import convert_umlauts, fix_csv_umlauts
+
+# Text columns converted by fix_umlauts.py
+TEXT_FIELDS = ('Name', 'Sub Name', 'Group Name')
+
+def process_repeater_csv(input_file):
+    """Write the _filtered, _filtered_ascii and .fixed versions of a repeater CSV."""
+    
+    filtered_file = input_file.replace('.csv', '_filtered.csv')
+    ascii_file = filtered_file.replace('.csv', '_ascii.csv')
+    fixed_file = f"{input_file}.fixed"
+    
+    kept_count = 0
+    filtered_count = 0
+    frequencies_fixed = 0
+    umlauts_fixed = 0
+    
+    with open(input_file, 'r', encoding='utf-8', newline='') as infile, \
+         open(filtered_file, 'w', encoding='utf-8', newline='') as filtered_out, \
+         open(ascii_file, 'w', encoding='utf-8', newline='') as ascii_out, \
+         open(fixed_file, 'w', encoding='utf-8', newline='') as fixed_out:
+        
+        reader = csv.reader(infile)
+        filtered_writer = csv.writer(filtered_out)
+        ascii_writer = csv.writer(ascii_out)
+        fixed_writer = csv.writer(fixed_out)
+        
+        header = next(reader, [])
+        filtered_writer.writerow(header)
+        ascii_writer.writerow(header)
+        fixed_writer.writerow(header)
+        
+        freq_idx = header.index('Frequency') if 'Frequency' in header else None
+        text_idxs = [header.index(field) for field in TEXT_FIELDS if field in header]
+        
+        for row in reader:
+            try:
+                frequency, fixed = fix_frequency_field(row[freq_idx])
+            except (TypeError, ValueError, IndexError):
+                # Unparseable frequency: kept as is in .fixed, dropped by the band filter
+                fixed_writer.writerow(row)
+                continue
+            
+            # Band filter and ASCII conversion look at the original frequency
+            if in_amateur_band(frequency):
+                filtered_writer.writerow(row)
+                kept_count += 1
+                
+                ascii_row = row.copy()
+                for i in text_idxs:
+                    text = ascii_row[i]
+                    if text:
+                        fixed_text = convert_umlauts(text)
+                        if fixed_text != text:
+                            umlauts_fixed += 1
+                        ascii_row[i] = fixed_text
+                ascii_writer.writerow(ascii_row)
+            else:
+                filtered_count += 1
+            
+            if fixed != frequency:
+                frequencies_fixed += 1
+            row[freq_idx] = fixed
+            fixed_writer.writerow(row)
+    
+    return kept_count, filtered_count, frequencies_fixed, umlauts_fixed
+
+def main():
+    print("📡 Filtering, fixing and ASCII-converting repeater CSV files...")
+    
+    files_to_process = [
+        'austrian_all_repeaters.csv',
+        'slovak_all_repeaters.csv', 
+        'singapore_all_repeaters.csv',
+        'all_repeaters_combined.csv'
+    ]
+    
+    # Not repeater lists, only need the umlaut fix
+    files_to_convert = [
+        'vienna_fm_radio_icom.csv',
+        'pmr_channels_icom.csv'
+    ]
+    
+    for filename in files_to_process:
+        if Path(filename).exists():
+            print(f"\n📻 Processing {filename}...")
+            
+            # Create backup
+            backup_file(filename)
+            
+            kept_count, filtered_count, frequencies_fixed, umlauts_fixed = process_repeater_csv(filename)
+            
+            print(f"✅ Kept: {kept_count}, Filtered: {filtered_count}, "
+                  f"Frequencies fixed: {frequencies_fixed}, Umlauts fixed: {umlauts_fixed}")
+        else:
+            print(f"⚠️ File not found: {filename}")
+    
+    for filename in files_to_convert:
+        if Path(filename).exists():
+            print(f"\n📝 Processing {filename}...")
+            output_filename = filename.replace('.csv', '_ascii.csv')
+            
+            umlauts_fixed = fix_csv_umlauts(filename, output_filename)
+            print(f"✅ Fixed {umlauts_fixed} umlauts -> {output_filename}")
+        else:
+            print(f"⚠️ File not found: {filename}")
+    
+    print("\n✅ All CSV files processed!")
+
+if __name__ == "__main__":
+    main()
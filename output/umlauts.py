@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Shared umlaut and special character conversion
+Maps German, Slovak and typographic characters to ASCII for Icom display
+"""
+
+import functools
+
+UMLAUT_MAP = {
+    'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue',
+    'ß': 'ss', 'é': 'e', 'É': 'E', 'è': 'e', 'È': 'E',
+    'á': 'a', 'Á': 'A', 'à': 'a', 'À': 'A', 'í': 'i', 'Í': 'I',
+    'ì': 'i', 'Ì': 'I', 'ó': 'o', 'Ó': 'O', 'ò': 'o', 'Ò': 'O',
+    'ú': 'u', 'Ú': 'U', 'ù': 'u', 'Ù': 'U', 'ñ': 'n', 'Ñ': 'N',
+    'ç': 'c', 'Ç': 'C', '–': '-', '—': '-',
+    '“': '"', '”': '"', '‘': "'", '’': "'",
+    '…': '...', 'ř': 'r', 'Ř': 'R',
+    'ľ': 'l', 'Ľ': 'L', 'š': 's', 'Š': 'S', 'ť': 't', 'Ť': 'T',
+    'ž': 'z', 'Ž': 'Z', 'ý': 'y', 'Ý': 'Y', 'č': 'c', 'Č': 'C',
+    'ď': 'd', 'Ď': 'D', 'ň': 'n', 'Ň': 'N', 'ô': 'o', 'Ô': 'O'
+}
+
+# Single-pass translation table built once at import
+UMLAUT_TABLE = str.maketrans(UMLAUT_MAP)
+
+# Location and park names repeat a lot, translate each distinct value once
+@functools.lru_cache(maxsize=None)
+def convert_umlauts(text):
+    """Convert umlauts and special characters to ASCII equivalents."""
+    # Every key in the table is non-ASCII, most park names need no work
+    if not text or text.isascii():
+        return text
+
+    return text.translate(UMLAUT_TABLE)
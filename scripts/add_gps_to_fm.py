@@ -9,6 +9,9 @@ import sys
 import argparse
 from pathlib import Path
 
+# Latitude, Longitude, Locator and Landmark for channels without a match
+EMPTY_GPS = ('', '', '', '')
+
 def read_csv_as_dict(filename, key_column):
     """Read CSV file and return as dictionary keyed by specified column."""
     data = {}
@@ -34,12 +37,13 @@ def read_intermediate_csv(filename):
             reader = csv.DictReader(f)
             for row in reader:
                 callsign = row['callsign']
-                gps_data[callsign] = {
-                    'lat': row.get('lat', ''),
-                    'long': row.get('long', ''),
-                    'landmark': row.get('landmark', ''),
-                    'locator': row.get('locator', '')
-                }
+                # Stored in output column order, ready to append to an FM channel row
+                gps_data[callsign] = (
+                    row.get('lat', ''),
+                    row.get('long', ''),
+                    row.get('locator', ''),
+                    row.get('landmark', '')
+                )
     except Exception as e:
         print(f"Error reading {filename}: {e}")
         return {}
@@ -61,40 +65,40 @@ def enhance_fm_csv_with_gps(fm_csv_file, intermediate_csv_file, output_file):
     # Process FM CSV file
     try:
         with open(fm_csv_file, 'r', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile, delimiter=';')
-            original_fieldnames = reader.fieldnames
+            # Semicolon-separated rows, RPT1 and name columns located once from the header
+            reader = csv.reader(infile, delimiter=';')
+            original_fieldnames = next(reader, [])
+            rpt1_idx = original_fieldnames.index('RPT1 Call Sign') if 'RPT1 Call Sign' in original_fieldnames else None
+            name_idx = original_fieldnames.index('Name') if 'Name' in original_fieldnames else None
             
             # Add GPS columns to fieldnames
             new_fieldnames = list(original_fieldnames) + ['Latitude', 'Longitude', 'Locator', 'Landmark']
             
+            field_count = len(original_fieldnames)
             rows_processed = 0
             rows_with_gps = 0
             
             with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-                writer = csv.DictWriter(outfile, fieldnames=new_fieldnames, delimiter=';')
-                writer.writeheader()
+                writer = csv.writer(outfile, delimiter=';')
+                writer.writerow(new_fieldnames)
                 
                 for row in reader:
                     rows_processed += 1
                     
+                    # Pad short rows so the GPS columns line up with the header
+                    if len(row) < field_count:
+                        row += [''] * (field_count - len(row))
+                    
                     # Extract callsign from RPT1 Call Sign column or Name column
-                    callsign = row.get('RPT1 Call Sign', '').strip()
-                    if not callsign:
-                        callsign = row.get('Name', '').strip()
+                    callsign = row[rpt1_idx].strip() if rpt1_idx is not None else ''
+                    if not callsign and name_idx is not None:
+                        callsign = row[name_idx].strip()
                     
                     # Add GPS data if available
-                    if callsign in gps_data:
-                        gps_info = gps_data[callsign]
-                        row['Latitude'] = gps_info['lat']
-                        row['Longitude'] = gps_info['long']
-                        row['Locator'] = gps_info['locator']
-                        row['Landmark'] = gps_info['landmark']
+                    gps_columns = gps_data.get(callsign, EMPTY_GPS)
+                    if gps_columns is not EMPTY_GPS:
                         rows_with_gps += 1
-                    else:
-                        row['Latitude'] = ''
-                        row['Longitude'] = ''
-                        row['Locator'] = ''
-                        row['Landmark'] = ''
+                    row += gps_columns
                     
                     writer.writerow(row)
             
@@ -5,27 +5,46 @@ Creates Icom ID-52PLUS compatible D-STAR CSV files in rptexample.csv format for
 """
 
 import csv
+import io
+import os
+import re
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Module letter at the end of a repeater callsign, e.g. "OE1XDS B"
+MODULE_SUFFIX_RE = re.compile(r' [ABC]$')
+
+COPY_CHUNK_SIZE = 1 << 20
+
+# Icom D-STAR CSV header (based on rptexample.csv)
+ICOM_DSTAR_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+# Header line as written by csv.writer, all country files share it
+HEADER_BYTES = (','.join(ICOM_DSTAR_HEADER) + '\r\n').encode('utf-8')
+
 def convert_mcp_to_icom_dstar_format(input_file, output_file, group_number, group_name, country_filter=None):
     """Convert memory-channels-processor CSV to Icom D-STAR format."""
     
-    # Icom D-STAR CSV header (based on rptexample.csv)
-    icom_dstar_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
-    processed_count = 0
+    # Determine UTC offset based on country, the same for every row
+    utc_offset = '+1:00'  # Default for Europe
+    if country_filter == 'Singapore':
+        utc_offset = '+8:00'
+    elif country_filter == 'Japan':
+        utc_offset = '+9:00'
     
     with open(input_file, 'r', encoding='utf-8') as infile, \
          open(output_file, 'w', encoding='utf-8', newline='') as outfile:
         
         reader = csv.DictReader(infile)
-        writer = csv.DictWriter(outfile, fieldnames=icom_dstar_header)
-        writer.writeheader()
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_DSTAR_HEADER)
+        icom_rows = []
         
         for row in reader:
             try:
@@ -57,10 +76,6 @@ def convert_mcp_to_icom_dstar_format(input_file, output_file, group_number, grou
                     dup = ''
                     offset_mhz = 0
                 
-                # D-STAR repeaters typically don't use CTCSS
-                tone_setting = 'OFF'
-                tone_value = '88.5Hz'
-                
                 # Determine position accuracy
                 position = 'Exact' if row.get('loc_exact', 'False').lower() == 'true' else 'Approximate'
                 
@@ -72,65 +87,47 @@ def convert_mcp_to_icom_dstar_format(input_file, output_file, group_number, grou
                     latitude = 0
                     longitude = 0
                 
-                # Determine UTC offset based on country
-                utc_offset = '+1:00'  # Default for Europe
-                if country_filter == 'Singapore':
-                    utc_offset = '+8:00'
-                elif country_filter == 'Japan':
-                    utc_offset = '+9:00'
-                
                 # Create gateway call sign (typically callsign with "G" suffix)
                 callsign = row.get('callsign', '').strip()
-                gateway_callsign = callsign.replace(' A', ' G').replace(' B', ' G').replace(' C', ' G')
+                gateway_callsign = MODULE_SUFFIX_RE.sub(' G', callsign)
                 if not gateway_callsign.endswith(' G') and callsign:
                     if len(callsign) <= 7:
                         gateway_callsign = callsign + ' G'
                     else:
                         gateway_callsign = callsign[:-1] + 'G'
                 
-                # Create Icom D-STAR format row
-                icom_row = {
-                    'Group No': group_number,
-                    'Group Name': group_name,
-                    'Name': row.get('name', '').strip(),
-                    'Sub Name': row.get('landmark', '').strip(),
-                    'Repeater Call Sign': callsign,
-                    'Gateway Call Sign': gateway_callsign,
-                    'Frequency': frequency,
-                    'Dup': dup,
-                    'Offset': offset_mhz,
-                    'Mode': 'DV',
-                    'TONE': tone_setting,
-                    'Repeater Tone': tone_value,
-                    'RPT1USE': 'YES',
-                    'Position': position,
-                    'Latitude': latitude,
-                    'Longitude': longitude,
-                    'UTC Offset': utc_offset
-                }
-                
-                writer.writerow(icom_row)
-                processed_count += 1
+                # Create Icom D-STAR format row, same column order as ICOM_DSTAR_HEADER
+                # D-STAR repeaters typically don't use CTCSS, TONE stays OFF
+                icom_rows.append((
+                    group_number, group_name, row.get('name', '').strip(), row.get('landmark', '').strip(),
+                    callsign, gateway_callsign, frequency, dup, offset_mhz,
+                    'DV', 'OFF', '88.5Hz', 'YES', position,
+                    latitude, longitude, utc_offset
+                ))
                 
             except (ValueError, KeyError) as e:
                 print(f"Warning: Skipping row due to error: {e}")
                 continue
+        
+        writer.writerows(icom_rows)
     
-    return processed_count
+    return len(icom_rows)
 
 def convert_japanese_dstar_csv(input_file, output_file, group_number, group_name):
     """Convert Japanese D-STAR CSV to standardized format."""
     
     processed_count = 0
     
-    # Try different encodings for Japanese file
+    # Read the file once, then try different encodings for Japanese file in memory
+    with open(input_file, 'rb') as f:
+        raw = f.read()
+    
     encodings = ['shift_jis', 'utf-8', 'cp932']
     content = None
     
     for encoding in encodings:
         try:
-            with open(input_file, 'r', encoding=encoding) as f:
-                content = f.read()
+            content = raw.decode(encoding)
             break
         except UnicodeDecodeError:
             continue
@@ -139,25 +136,13 @@ def convert_japanese_dstar_csv(input_file, output_file, group_number, group_name
         print(f"Error: Could not decode {input_file}")
         return 0
     
-    # Write to temporary file with utf-8 encoding
-    temp_file = 'temp_japanese_dstar.csv'
-    with open(temp_file, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
-    # Process the temporary file
-    with open(temp_file, 'r', encoding='utf-8') as infile, \
+    # Parse the decoded text directly, newline=None translates line endings like a text file
+    with io.StringIO(content, newline=None) as infile, \
          open(output_file, 'w', encoding='utf-8', newline='') as outfile:
         
         reader = csv.DictReader(infile)
         
-        # Update group information
-        icom_dstar_header = [
-            'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-            'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-            'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-        ]
-        
-        writer = csv.DictWriter(outfile, fieldnames=icom_dstar_header)
+        writer = csv.DictWriter(outfile, fieldnames=ICOM_DSTAR_HEADER)
         writer.writeheader()
         
         for row in reader:
@@ -174,86 +159,65 @@ def convert_japanese_dstar_csv(input_file, output_file, group_number, group_name
                 print(f"Warning: Skipping Japanese row due to error: {e}")
                 continue
     
-    # Clean up temporary file
-    Path(temp_file).unlink(missing_ok=True)
-    
     return processed_count
 
 def main():
-    austrian_count = 0
-    slovak_count = 0
-    singapore_count = 0
-    
-    # Austrian D-STAR repeaters
-    if Path('mcp_tmp_repeaters.csv').exists():
-        print("🇦🇹 Creating Austrian D-STAR repeaters CSV...")
-        austrian_count = convert_mcp_to_icom_dstar_format(
-            'mcp_tmp_repeaters.csv',
-            'austrian_dstar_repeaters.csv',
-            32,
-            'AT-DSTAR',
-            'Austria'
-        )
-        print(f"✅ Created {austrian_count} Austrian D-STAR repeaters")
-    else:
-        print("❌ Austrian repeater data not found")
+    # Flag, label, candidate input files, output file, group number, group name, country
+    sources = [
+        ('🇦🇹', 'Austrian', ['mcp_tmp_repeaters.csv'],
+         'austrian_dstar_repeaters.csv', 32, 'AT-DSTAR', 'Austria'),
+        ('🇸🇰', 'Slovak', ['slovakia_tmp_repeaters.csv', '../slovakia_temp.csv'],
+         'slovak_dstar_repeaters.csv', 33, 'SK-DSTAR', 'Slovakia'),
+        ('🇸🇬', 'Singapore', ['../singapore_repeaters.csv', 'singapore_repeaters.csv'],
+         'singapore_dstar_repeaters.csv', 34, 'SG-DSTAR', 'Singapore')
+    ]
     
-    # Slovak D-STAR repeaters - try different sources
-    slovak_files = ['slovakia_tmp_repeaters.csv', '../slovakia_temp.csv']
-    for slovak_file in slovak_files:
-        if Path(slovak_file).exists():
-            print(f"\n🇸🇰 Creating Slovak D-STAR repeaters CSV from {slovak_file}...")
-            slovak_count = convert_mcp_to_icom_dstar_format(
-                slovak_file,
-                'slovak_dstar_repeaters.csv',
-                33,
-                'SK-DSTAR',
-                'Slovakia'
+    # Countries are independent, convert them in parallel processes
+    conversions = []
+    with ProcessPoolExecutor(max_workers=min(len(sources), os.cpu_count() or 1)) as executor:
+        for flag, label, input_files, output_file, group_number, group_name, country in sources:
+            input_file = next((f for f in input_files if Path(f).exists()), None)
+            if input_file is None:
+                print(f"❌ {label} repeater data not found")
+                continue
+            
+            print(f"{flag} Creating {label} D-STAR repeaters CSV from {input_file}...")
+            future = executor.submit(
+                convert_mcp_to_icom_dstar_format,
+                input_file,
+                output_file,
+                group_number,
+                group_name,
+                country
             )
-            print(f"✅ Created {slovak_count} Slovak D-STAR repeaters")
-            break
-    else:
-        print("❌ Slovak repeater data not found")
+            conversions.append((label, output_file, future))
     
-    # Singapore D-STAR repeaters
-    singapore_files = ['../singapore_repeaters.csv', 'singapore_repeaters.csv']
-    for singapore_file in singapore_files:
-        if Path(singapore_file).exists():
-            print(f"\n🇸🇬 Creating Singapore D-STAR repeaters CSV from {singapore_file}...")
-            singapore_count = convert_mcp_to_icom_dstar_format(
-                singapore_file,
-                'singapore_dstar_repeaters.csv',
-                34,
-                'SG-DSTAR',
-                'Singapore'
-            )
-            print(f"✅ Created {singapore_count} Singapore D-STAR repeaters")
-            break
-    else:
-        print("❌ Singapore repeater data not found")
+    total_count = 0
+    converted_files = []
+    for label, output_file, future in conversions:
+        # A failed country is reported and left out, the others are still combined
+        try:
+            count = future.result()
+        except Exception as e:
+            print(f"❌ Error converting {label} D-STAR repeaters: {e}")
+            continue
+        total_count += count
+        converted_files.append(output_file)
+        print(f"✅ Created {count} {label} D-STAR repeaters")
     
     # Create combined file
     print("\n🌍 Creating combined D-STAR repeaters CSV...")
     
-    combined_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
-    with open('combined_dstar_repeaters.csv', 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=combined_header)
-        writer.writeheader()
+    # All country files share the header, append their data rows as raw bytes
+    with open('combined_dstar_repeaters.csv', 'wb') as outfile:
+        outfile.write(HEADER_BYTES)
         
-        # Combine all files
-        for filename in ['austrian_dstar_repeaters.csv', 'slovak_dstar_repeaters.csv', 'singapore_dstar_repeaters.csv']:
-            if Path(filename).exists():
-                with open(filename, 'r', encoding='utf-8') as infile:
-                    reader = csv.DictReader(infile)
-                    for row in reader:
-                        writer.writerow(row)
+        # Combine the files converted above, a failed country's file may be incomplete
+        for filename in converted_files:
+            with open(filename, 'rb') as infile:
+                infile.readline()  # Skip header, written once above
+                shutil.copyfileobj(infile, outfile, COPY_CHUNK_SIZE)
     
-    total_count = austrian_count + slovak_count + singapore_count
     print(f"✅ Combined file created with {total_count} total D-STAR repeaters")
     
     print("\n📁 Generated D-STAR files:")
@@ -5,196 +5,188 @@ Creates Icom ID-52PLUS compatible CSV files in fmexample.csv format for Austria,
 """
 
 import csv
+import functools
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from gps_common import read_rows_with_defaults
+
+# 1 MiB file buffers, input files can be several MB
+IO_BUFFER_SIZE = 1 << 20
+
+# Icom FM CSV header (based on fmexample.csv)
+ICOM_FM_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+# UTC offsets of countries outside Central Europe
+UTC_OFFSETS = {'Singapore': '+8:00', 'Japan': '+9:00'}
+
+# Columns read from memory-channels-processor CSVs, with the value used when a file lacks one
+MCP_COLUMN_DEFAULTS = {
+    'country': '', 'fm': 'True', 'freq_tx': '0', 'offset': '0', 'dup': '',
+    'ctcss_tx': '', 'loc_exact': 'False', 'lat': '0', 'long': '0',
+    'name': '', 'landmark': '', 'callsign': ''
+}
+
+# Repeaters share a handful of standard shifts, parse each dup and offset pair once
+@functools.lru_cache(maxsize=None)
+def parse_duplex(dup_direction, offset):
+    """Return the Icom Dup setting and offset in MHz for a dup direction and offset text."""
+    try:
+        offset_mhz = float(offset)
+    except ValueError:
+        return '', 0
+    
+    if dup_direction == '+':
+        return 'DUP+', offset_mhz
+    elif dup_direction == '-':
+        return 'DUP-', offset_mhz
+    return '', 0
+
+# Only a few dozen CTCSS tones exist, parse and format each one once
+@functools.lru_cache(maxsize=None)
+def parse_tone(ctcss_tx):
+    """Return the Icom TONE setting and repeater tone for a CTCSS text."""
+    if ctcss_tx:
+        try:
+            return 'TONE', f"{float(ctcss_tx)}Hz"
+        except ValueError:
+            pass
+    return 'OFF', '88.5Hz'
+
 def convert_mcp_to_icom_fm_format(input_file, output_file, group_number, group_name, country_filter=None):
-    """Convert memory-channels-processor CSV to Icom FM format."""
+    """Convert memory-channels-processor CSV to Icom FM format, return the Icom rows."""
     
-    # Icom FM CSV header (based on fmexample.csv)
-    icom_fm_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
+    icom_rows = []
     
-    processed_count = 0
+    # Determine UTC offset based on country, the same for every row
+    utc_offset = UTC_OFFSETS.get(country_filter, '+1:00')  # Default for Europe
     
-    with open(input_file, 'r', encoding='utf-8') as infile, \
-         open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+    with open(input_file, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as infile, \
+         open(output_file, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as outfile:
         
-        reader = csv.DictReader(infile)
-        writer = csv.DictWriter(outfile, fieldnames=icom_fm_header)
-        writer.writeheader()
+        index, rows = read_rows_with_defaults(csv.reader(infile), MCP_COLUMN_DEFAULTS)
         
-        for row in reader:
+        country_idx = index['country']
+        fm_idx = index['fm']
+        # Use RX frequency (what you listen on), TX frequency only if there is no RX column
+        freq_idx = index.get('freq_rx', index['freq_tx'])
+        offset_idx = index['offset']
+        dup_idx = index['dup']
+        ctcss_idx = index['ctcss_tx']
+        loc_exact_idx = index['loc_exact']
+        lat_idx = index['lat']
+        long_idx = index['long']
+        name_idx = index['name']
+        landmark_idx = index['landmark']
+        callsign_idx = index['callsign']
+        
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_FM_HEADER)
+        
+        for row in rows:
             try:
-                # Filter by country if specified
-                if country_filter and row.get('country', '') != country_filter:
-                    continue
-                
-                # Only process FM repeaters
-                if row.get('fm', 'True').lower() != 'true':
+                # Only process FM repeaters, of the given country if specified
+                if (country_filter and row[country_idx] != country_filter) or row[fm_idx].lower() != 'true':
                     continue
                 
-                # Extract frequency and convert to float - use RX frequency (what you listen on)
-                frequency = float(row.get('freq_rx', row.get('freq_tx', 0)))
+                # Extract frequency and convert to float
+                frequency = float(row[freq_idx])
                 
                 # Calculate offset and determine duplex
-                try:
-                    offset_mhz = float(row.get('offset', 0))
-                    dup_direction = row.get('dup', '')
-                    
-                    if dup_direction == '+':
-                        dup = 'DUP+'
-                    elif dup_direction == '-':
-                        dup = 'DUP-'
-                    else:
-                        dup = ''
-                        offset_mhz = 0
-                except (ValueError, KeyError):
-                    dup = ''
-                    offset_mhz = 0
+                dup, offset_mhz = parse_duplex(row[dup_idx], row[offset_idx])
                 
                 # Extract CTCSS
-                ctcss_tx = row.get('ctcss_tx', '')
-                if ctcss_tx:
-                    try:
-                        tone_freq = float(ctcss_tx)
-                        tone_setting = 'TONE'
-                        tone_value = f"{tone_freq}Hz"
-                    except ValueError:
-                        tone_setting = 'OFF'
-                        tone_value = '88.5Hz'
-                else:
-                    tone_setting = 'OFF'
-                    tone_value = '88.5Hz'
+                tone_setting, tone_value = parse_tone(row[ctcss_idx])
                 
                 # Determine position accuracy
-                position = 'Exact' if row.get('loc_exact', 'False').lower() == 'true' else 'Approximate'
+                position = 'Exact' if row[loc_exact_idx].lower() == 'true' else 'Approximate'
                 
                 # Get GPS coordinates
                 try:
-                    latitude = float(row.get('lat', 0))
-                    longitude = float(row.get('long', 0))
+                    latitude = float(row[lat_idx])
+                    longitude = float(row[long_idx])
                 except (ValueError, TypeError):
                     latitude = 0
                     longitude = 0
                 
-                # Determine UTC offset based on country
-                utc_offset = '+1:00'  # Default for Europe
-                if country_filter == 'Singapore':
-                    utc_offset = '+8:00'
-                elif country_filter == 'Japan':
-                    utc_offset = '+9:00'
-                
-                # Create Icom FM format row
-                icom_row = {
-                    'Group No': group_number,
-                    'Group Name': group_name,
-                    'Name': row.get('name', '').strip(),
-                    'Sub Name': row.get('landmark', '').strip(),
-                    'Repeater Call Sign': row.get('callsign', '').strip(),
-                    'Gateway Call Sign': '',  # FM doesn't use gateway
-                    'Frequency': frequency,
-                    'Dup': dup,
-                    'Offset': offset_mhz,
-                    'Mode': 'FM',
-                    'TONE': tone_setting,
-                    'Repeater Tone': tone_value,
-                    'RPT1USE': 'YES' if tone_setting != 'OFF' else 'NO',
-                    'Position': position,
-                    'Latitude': latitude,
-                    'Longitude': longitude,
-                    'UTC Offset': utc_offset
-                }
-                
-                writer.writerow(icom_row)
-                processed_count += 1
+                # Create Icom FM format row, same column order as ICOM_FM_HEADER
+                # FM doesn't use a gateway call sign
+                icom_rows.append((
+                    group_number, group_name, row[name_idx].strip(), row[landmark_idx].strip(),
+                    row[callsign_idx].strip(), '', frequency, dup, offset_mhz,
+                    'FM', tone_setting, tone_value, 'YES' if tone_setting != 'OFF' else 'NO', position,
+                    latitude, longitude, utc_offset
+                ))
                 
             except (ValueError, KeyError) as e:
                 print(f"Warning: Skipping row due to error: {e}")
                 continue
+        
+        writer.writerows(icom_rows)
     
-    return processed_count
+    return icom_rows
 
 def main():
-    austrian_count = 0
-    slovak_count = 0
-    singapore_count = 0
-    
-    # Austrian repeaters
-    if Path('mcp_tmp_repeaters.csv').exists():
-        print("🇦🇹 Creating Austrian FM repeaters CSV...")
-        austrian_count = convert_mcp_to_icom_fm_format(
-            'mcp_tmp_repeaters.csv',
-            'austrian_fm_repeaters.csv',
-            32,
-            'AT-Repeaters',
-            'Austria'
-        )
-        print(f"✅ Created {austrian_count} Austrian FM repeaters")
-    else:
-        print("❌ Austrian repeater data not found")
-    
-    # Slovak repeaters - try different sources
-    slovak_files = ['slovakia_tmp_repeaters.csv', '../slovakia_temp.csv']
-    for slovak_file in slovak_files:
-        if Path(slovak_file).exists():
-            print(f"\n🇸🇰 Creating Slovak FM repeaters CSV from {slovak_file}...")
-            slovak_count = convert_mcp_to_icom_fm_format(
-                slovak_file,
-                'slovak_fm_repeaters.csv',
-                33,
-                'SK-Repeaters',
-                'Slovakia'
-            )
-            print(f"✅ Created {slovak_count} Slovak FM repeaters")
-            break
-    else:
-        print("❌ Slovak repeater data not found")
+    # Flag, label, candidate input files, output file, group number, group name, country
+    sources = [
+        ('🇦🇹', 'Austrian', ['mcp_tmp_repeaters.csv'],
+         'austrian_fm_repeaters.csv', 32, 'AT-Repeaters', 'Austria'),
+        ('🇸🇰', 'Slovak', ['slovakia_tmp_repeaters.csv', '../slovakia_temp.csv'],
+         'slovak_fm_repeaters.csv', 33, 'SK-Repeaters', 'Slovakia'),
+        ('🇸🇬', 'Singapore', ['../singapore_repeaters.csv', 'singapore_repeaters.csv'],
+         'singapore_fm_repeaters.csv', 34, 'SG-Repeaters', 'Singapore')
+    ]
     
-    # Singapore repeaters
-    singapore_files = ['../singapore_repeaters.csv', 'singapore_repeaters.csv']
-    for singapore_file in singapore_files:
-        if Path(singapore_file).exists():
-            print(f"\n🇸🇬 Creating Singapore FM repeaters CSV from {singapore_file}...")
-            singapore_count = convert_mcp_to_icom_fm_format(
-                singapore_file,
-                'singapore_fm_repeaters.csv',
-                34,
-                'SG-Repeaters',
-                'Singapore'
+    # Countries are independent, convert them in parallel processes
+    conversions = []
+    with ProcessPoolExecutor(max_workers=min(len(sources), os.cpu_count() or 1)) as executor:
+        for flag, label, input_files, output_file, group_number, group_name, country in sources:
+            input_file = next((f for f in input_files if Path(f).exists()), None)
+            if input_file is None:
+                print(f"❌ {label} repeater data not found")
+                continue
+            
+            print(f"{flag} Creating {label} FM repeaters CSV from {input_file}...")
+            future = executor.submit(
+                convert_mcp_to_icom_fm_format,
+                input_file,
+                output_file,
+                group_number,
+                group_name,
+                country
             )
-            print(f"✅ Created {singapore_count} Singapore FM repeaters")
-            break
-    else:
-        print("❌ Singapore repeater data not found")
+            conversions.append((label, future))
     
-    print(f"✅ Created {singapore_count} Singapore FM repeaters")
+    # Converted rows per country, kept for the combined file
+    country_rows = []
+    for label, future in conversions:
+        # A failed country is reported and left out, the others are still combined
+        try:
+            rows = future.result()
+        except Exception as e:
+            print(f"❌ Error converting {label} FM repeaters: {e}")
+            continue
+        country_rows.append(rows)
+        print(f"✅ Created {len(rows)} {label} FM repeaters")
     
     # Create combined file
     print("\n🌍 Creating combined FM repeaters CSV...")
     
-    combined_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
-    with open('combined_fm_repeaters.csv', 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=combined_header)
-        writer.writeheader()
+    with open('combined_fm_repeaters.csv', 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_FM_HEADER)
         
-        # Combine all files
-        for filename in ['austrian_fm_repeaters.csv', 'slovak_fm_repeaters.csv', 'singapore_fm_repeaters.csv']:
-            if Path(filename).exists():
-                with open(filename, 'r', encoding='utf-8') as infile:
-                    reader = csv.DictReader(infile)
-                    for row in reader:
-                        writer.writerow(row)
+        # Combine the rows already converted above, no second pass over the country files
+        for rows in country_rows:
+            writer.writerows(rows)
     
-    total_count = austrian_count + slovak_count + singapore_count
+    total_count = sum(map(len, country_rows))
     print(f"✅ Combined file created with {total_count} total FM repeaters")
     
     print("\n📁 Generated files:")
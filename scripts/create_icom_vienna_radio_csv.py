@@ -5,9 +5,36 @@ Creates Icom ID-52PLUS compatible CSV file for FM radio stations around Vienna
 """
 
 import csv
+import heapq
 import sys
 from pathlib import Path
 import math
+from operator import itemgetter
+
+from gps_common import read_rows_with_defaults
+
+# 1 MiB file buffers, input files can be several MB
+IO_BUFFER_SIZE = 1 << 20
+
+# Icom CSV header
+ICOM_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+# Priority stations and major networks (higher score = more important)
+PRIORITY_STATIONS = {
+    'Ö1': 100, 'Ö3': 95, 'FM4': 90, 'Kronehit': 85, 'ENERGY': 80, 'oe24': 75,
+    'Hitradio Ö3': 70, 'Radio Wien': 65, 'ROCK ANTENNE': 60, 'Life Radio': 55,
+    'Stadtradio Krems': 95  # Add Stadtradio Krems with high priority
+}
+
+# Columns read from the FM radio CSV, with the value used when a file lacks one
+RADIO_COLUMN_DEFAULTS = {
+    'lat': '0', 'long': '0', 'freq_rx': '', 'name': '', 'landmark': '',
+    'state': '', 'loc_exact': ''
+}
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two coordinates in km."""
@@ -22,58 +49,77 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     
     return R * c
 
+# Vienna coordinates (city center)
+VIENNA_LAT = 48.2082
+VIENNA_LON = 16.3738
+
+# Terms of calculate_distance that only depend on the city center, computed once
+VIENNA_LAT_RAD = math.radians(VIENNA_LAT)
+VIENNA_LON_RAD = math.radians(VIENNA_LON)
+VIENNA_COS_LAT = math.cos(VIENNA_LAT_RAD)
+
+def distance_from_vienna(lat, lon):
+    """Calculate distance from Vienna city center in km, same result as calculate_distance."""
+    lat = math.radians(lat)
+    lon = math.radians(lon)
+    dlat = lat - VIENNA_LAT_RAD
+    dlon = lon - VIENNA_LON_RAD
+    
+    a = math.sin(dlat/2)**2 + VIENNA_COS_LAT * math.cos(lat) * math.sin(dlon/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+    
+    return 6371 * c
+
 def convert_vienna_radio_to_icom_format(input_file, output_file, group_number, group_name):
     """Convert Vienna FM radio stations to Icom format."""
     
-    # Vienna coordinates (city center)
-    vienna_lat = 48.2082
-    vienna_lon = 16.3738
     max_distance = 150  # 150 km radius around Vienna
+    # One degree of latitude is at least 111.19 km, stations further north or south
+    # than this are out of range without computing the distance (0.01 degree margin)
+    max_lat_delta = max_distance / 111.19 + 0.01
     
-    # Icom CSV header
-    icom_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
-    # Priority stations and major networks (higher score = more important)
-    priority_stations = {
-        'Ö1': 100, 'Ö3': 95, 'FM4': 90, 'Kronehit': 85, 'ENERGY': 80, 'oe24': 75,
-        'Hitradio Ö3': 70, 'Radio Wien': 65, 'ROCK ANTENNE': 60, 'Life Radio': 55,
-        'Stadtradio Krems': 95  # Add Stadtradio Krems with high priority
-    }
-    
-    stations = []
-    seen_stations = set()  # Track unique station names to avoid duplicates
-    
-    with open(input_file, 'r', encoding='utf-8') as infile:
-        reader = csv.DictReader(infile)
+    # Stations by normalized name, the first row of each name wins and keeps its order
+    stations_by_key = {}
+    
+    with open(input_file, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as infile:
+        index, rows = read_rows_with_defaults(csv.reader(infile), RADIO_COLUMN_DEFAULTS)
+        
+        lat_idx = index['lat']
+        long_idx = index['long']
+        freq_idx = index['freq_rx']
+        name_idx = index['name']
+        landmark_idx = index['landmark']
+        state_idx = index['state']
+        loc_exact_idx = index['loc_exact']
         
-        for row in reader:
+        for row in rows:
             try:
                 # Get coordinates
-                lat = float(row.get('lat', 0))
-                lon = float(row.get('long', 0))
+                lat = float(row[lat_idx])
+                lon = float(row[long_idx])
+                
+                # Cheap latitude check first, most stations of a national list are far away
+                if abs(lat - VIENNA_LAT) > max_lat_delta:
+                    continue
                 
                 # Calculate distance from Vienna
-                distance = calculate_distance(vienna_lat, vienna_lon, lat, lon)
+                distance = distance_from_vienna(lat, lon)
                 
                 # Filter for Vienna area (within max_distance km)
                 if distance > max_distance:
                     continue
                 
                 # Get frequency
-                frequency = float(row['freq_rx'])
+                frequency = float(row[freq_idx])
                 
                 # Only include FM broadcast band (87.5 - 108 MHz)
                 if not (87.5 <= frequency <= 108.0):
                     continue
                 
                 # Get station name and location
-                station_name = row.get('name', '').strip()
-                location = row.get('landmark', '').strip()
-                state = row.get('state', '').strip()
+                station_name = row[name_idx].strip()
+                location = row[landmark_idx].strip()
+                state = row[state_idx].strip()
                 
                 # Format name
                 if not station_name:
@@ -81,12 +127,11 @@ def convert_vienna_radio_to_icom_format(input_file, output_file, group_number, g
                 
                 # Skip duplicates - use station name as key
                 station_key = station_name.lower().replace(' ', '')
-                if station_key in seen_stations:
+                if station_key in stations_by_key:
                     continue
-                seen_stations.add(station_key)
                 
                 # Calculate priority score
-                priority_score = priority_stations.get(station_name, 0)
+                priority_score = PRIORITY_STATIONS.get(station_name, 0)
                 # Add distance bonus (closer = higher score)
                 distance_bonus = max(0, 50 - distance)
                 total_score = priority_score + distance_bonus
@@ -102,50 +147,41 @@ def convert_vienna_radio_to_icom_format(input_file, output_file, group_number, g
                     'frequency': frequency,
                     'lat': lat,
                     'lon': lon,
-                    'loc_exact': row.get('loc_exact', '').lower() == 'true'
+                    'loc_exact': row[loc_exact_idx].lower() == 'true'
                 }
                 
-                stations.append(station_data)
+                stations_by_key[station_key] = station_data
                 
             except (ValueError, KeyError, TypeError) as e:
                 print(f"Warning: Skipping row due to error: {e}")
                 continue
     
-    # Sort by score (highest first) and take top 50
-    stations.sort(key=lambda x: x['score'], reverse=True)
-    top_stations = stations[:50]
+    # Take top 50 by score (highest first), same order as a full stable sort
+    top_stations = heapq.nlargest(50, stations_by_key.values(), key=itemgetter('score'))
     
     # Write to CSV
     processed_count = 0
-    with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=icom_header)
-        writer.writeheader()
+    with open(output_file, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_HEADER)
         
         for station in top_stations:
-            icom_row = {
-                'Group No': group_number,
-                'Group Name': group_name,
-                'Name': station['name'],
-                'Sub Name': station['sub_name'],
-                'Repeater Call Sign': '',
-                'Gateway Call Sign': '',
-                'Frequency': station['frequency'],
-                'Dup': '',
-                'Offset': 0.0,
-                'Mode': 'FM',
-                'TONE': 'OFF',
-                'Repeater Tone': '88.5Hz',
-                'RPT1USE': 'NO',
-                'Position': 'Exact' if station['loc_exact'] else 'Approximate',
-                'Latitude': station['lat'],
-                'Longitude': station['lon'],
-                'UTC Offset': '+1:00'
-            }
-            
-            writer.writerow(icom_row)
+            # Same column order as ICOM_HEADER
+            writer.writerow((
+                group_number, group_name, station['name'], station['sub_name'], '', '',
+                station['frequency'], '', 0.0, 'FM', 'OFF', '88.5Hz', 'NO',
+                'Exact' if station['loc_exact'] else 'Approximate',
+                station['lat'], station['lon'], '+1:00'
+            ))
             processed_count += 1
     
-    return processed_count
+    # Whether Stadtradio Krems made it into the written stations
+    stadtradio_found = any(
+        'Stadtradio Krems' in station['name'] or 'Stadtradio Krems' in station['sub_name']
+        for station in top_stations
+    )
+    
+    return processed_count, stadtradio_found
 
 def main():
     if not Path('vienna_fm_radio.csv').exists():
@@ -154,7 +190,7 @@ def main():
     
     print("📻 Creating Vienna FM radio stations CSV for Icom ID-52PLUS...")
     
-    radio_count = convert_vienna_radio_to_icom_format(
+    radio_count, stadtradio_found = convert_vienna_radio_to_icom_format(
         'vienna_fm_radio.csv',
         'vienna_fm_radio_icom.csv',
         81,  # Use group 81 for Vienna FM radio
@@ -163,20 +199,17 @@ def main():
     
     # Add Stadtradio Krems manually if not found in data
     stadtradio_added = False
-    try:
-        with open('vienna_fm_radio_icom.csv', 'r', encoding='utf-8') as check_file:
-            content = check_file.read()
-            if 'Stadtradio Krems' not in content:
-                # Add Stadtradio Krems manually
-                with open('vienna_fm_radio_icom.csv', 'a', encoding='utf-8', newline='') as append_file:
-                    writer = csv.writer(append_file)
-                    # Stadtradio Krems on 97.2 MHz
-                    writer.writerow([81, 'Vienna-FM-Radio', 'Stadtradio Krems', 'Krems', '', '', 97.2, '', 0.0, 'FM', 'OFF', '88.5Hz', 'NO', 'Exact', 48.408, 15.61, '+1:00'])
-                    radio_count += 1
-                    stadtradio_added = True
-                    print("✅ Added Stadtradio Krems manually")
-    except:
-        pass
+    if not stadtradio_found:
+        try:
+            with open('vienna_fm_radio_icom.csv', 'a', encoding='utf-8', newline='') as append_file:
+                writer = csv.writer(append_file)
+                # Stadtradio Krems on 97.2 MHz
+                writer.writerow([81, 'Vienna-FM-Radio', 'Stadtradio Krems', 'Krems', '', '', 97.2, '', 0.0, 'FM', 'OFF', '88.5Hz', 'NO', 'Exact', 48.408, 15.61, '+1:00'])
+                radio_count += 1
+                stadtradio_added = True
+                print("✅ Added Stadtradio Krems manually")
+        except:
+            pass
     
     print(f"✅ Created {radio_count} top Vienna area FM radio stations (no duplicates)")
     print("\n📁 Generated file:")
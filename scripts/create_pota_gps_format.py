@@ -5,53 +5,29 @@ Creates GPS format files like gpsexample.csv with groups U (Austria), V (Slovaki
 Generates separate files for each location (AT-NO, AT-WI, SK-BC, etc.)
 """
 
-import json
-import csv
-import subprocess
-import time
-from pathlib import Path
+import os
+from concurrent.futures import ThreadPoolExecutor
 import sys
 from datetime import datetime
 
-def convert_umlauts(text):
-    """Convert umlauts and special characters to ASCII equivalents."""
-    if not text:
-        return text
-    
-    umlaut_map = {
-        'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue',
-        'ß': 'ss', 'é': 'e', 'É': 'E', 'è': 'e', 'È': 'E',
-        'á': 'a', 'Á': 'A', 'à': 'a', 'À': 'A', 'í': 'i', 'Í': 'I',
-        'ì': 'i', 'Ì': 'I', 'ó': 'o', 'Ó': 'O', 'ò': 'o', 'Ò': 'O',
-        'ú': 'u', 'Ú': 'U', 'ù': 'u', 'Ù': 'U', 'ñ': 'n', 'Ñ': 'N',
-        'ç': 'c', 'Ç': 'C', '–': '-', '—': '-', '"': '"', '"': '"',
-        ''': "'", ''': "'", '…': '...', 'ř': 'r', 'Ř': 'R',
-        'ľ': 'l', 'Ľ': 'L', 'š': 's', 'Š': 'S', 'ť': 't', 'Ť': 'T',
-        'ž': 'z', 'Ž': 'Z', 'ý': 'y', 'Ý': 'Y', 'č': 'c', 'Č': 'C',
-        'ď': 'd', 'Ď': 'D', 'ň': 'n', 'Ň': 'N', 'ô': 'o', 'Ô': 'O'
-    }
-    
-    result = text
-    for umlaut, replacement in umlaut_map.items():
-        result = result.replace(umlaut, replacement)
-    
-    return result
+from gps_common import (
+    GPS_HEADER_LINE, LOCATIONS_MAX_AGE, MAX_PARALLEL_FETCHES, PARKS_MAX_AGE, SESSION,
+    combine_gps_csvs, convert_umlauts, fetch_json_cached, fit_display_name, gps_csv_lines, write_gps_csv
+)
+
+if SESSION is None:
+    print("Warning: requests module not available. POTA functionality will be limited.")
+    print("Install with: apt install python3-requests")
 
 def fetch_pota_locations():
     """Fetch POTA program locations to get descriptors for countries."""
+    if SESSION is None:
+        print("❌ Error: requests module not available for POTA API access")
+        return {}
+    
     try:
         print("📡 Fetching POTA program locations...")
-        result = subprocess.run(
-            ['curl', '-s', 'https://api.pota.app/programs/locations'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            print(f"❌ Error fetching locations: {result.stderr}")
-            return {}
-        
-        data = json.loads(result.stdout)
+        data = fetch_json_cached('https://api.pota.app/programs/locations', LOCATIONS_MAX_AGE)
         
         # Extract location descriptors for target countries
         countries = {}
@@ -87,18 +63,11 @@ def fetch_pota_locations():
 
 def fetch_parks_for_location(descriptor):
     """Fetch all parks for a specific location descriptor."""
+    if SESSION is None:
+        return []
+    
     try:
-        result = subprocess.run(
-            ['curl', '-s', f'https://api.pota.app/location/parks/{descriptor}'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            return []
-        
-        parks_data = json.loads(result.stdout)
-        return parks_data
+        return fetch_json_cached(f'https://api.pota.app/location/parks/{descriptor}', PARKS_MAX_AGE)
         
     except Exception as e:
         print(f"❌ Error fetching parks for {descriptor}: {e}")
@@ -123,13 +92,8 @@ def create_pota_gps_files():
         print("❌ Failed to fetch country locations")
         return 0
     
-    # Create output directories
-    Path('POTA-GPS').mkdir(exist_ok=True)
-    Path('POTA-GPS/Austria').mkdir(exist_ok=True)
-    Path('POTA-GPS/Slovakia').mkdir(exist_ok=True)
-    Path('POTA-GPS/Singapore').mkdir(exist_ok=True)
-    
     country_totals = {}
+    country_files = {}  # Country files written in this run, for the combined master file
     current_date = datetime.now().strftime('%m/%d/%Y')
     
     # Process each country
@@ -138,113 +102,107 @@ def create_pota_gps_files():
         locations = country_info['locations']
         group_info = group_map[country_code]
         
-        print(f"\n🏞️ Processing {country_name} ({country_code}) - Group {group_info['group']}")
+        # The same for every park of the country, looked up once
+        group = group_info['group']
+        group_name = group_info['group_name']
+        
+        print(f"\n🏞️ Processing {country_name} ({country_code}) - Group {group}")
         print(f"   Found {len(locations)} locations with parks")
         
-        country_parks = []
-        location_files = {}
+        country_filename = f"POTA-GPS/pota_{country_code.lower()}_all.csv"
+        country_file = None  # Opened with the first location that has parks
+        country_park_count = 0
+        location_count = 0
+        
+        # Fetch parks for all locations concurrently, results keep location order
+        descriptors = [location['descriptor'] for location in locations]
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_FETCHES) as executor:
+            parks_by_location = list(executor.map(fetch_parks_for_location, descriptors))
         
-        # Process each location
-        for location in locations:
-            descriptor = location['descriptor']
-            location_name = location['name']
-            expected_parks = location['parks']
-            
-            print(f"   📍 {descriptor}: {location_name} ({expected_parks} parks)")
-            
-            parks = fetch_parks_for_location(descriptor)
-            location_parks = []
-            
-            for park in parks:
-                try:
-                    ref = park.get('reference', '')
-                    name = park.get('name', '')
-                    lat = park.get('latitude', 0)
-                    lon = park.get('longitude', 0)
-                    grid = park.get('grid', '')
+        # Each location is written as soon as it is processed, only counters stay in memory
+        try:
+            for location, parks in zip(locations, parks_by_location):
+                descriptor = location['descriptor']
+                location_name = location['name']
+                expected_parks = location['parks']
+                
+                print(f"   📍 {descriptor}: {location_name} ({expected_parks} parks)")
+                
+                location_parks = []
+                
+                # Parks are validated explicitly, malformed entries are reported by reference
+                for park in parks:
+                    ref = park.get('reference') or ''
+                    lat = park.get('latitude')
+                    lon = park.get('longitude')
                     
-                    # Clean names for display
-                    clean_ref = convert_umlauts(ref)
-                    clean_name = convert_umlauts(name)
+                    if not ref:
+                        print("      ⚠️  Skipping park without reference")
+                        continue
                     
                     # Skip if no valid coordinates
-                    if not lat or not lon or lat == 0 or lon == 0:
+                    if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)) or lat == 0 or lon == 0:
                         print(f"      ⚠️  Skipping {ref}: No valid coordinates")
                         continue
                     
+                    # Clean name for display
+                    clean_name = convert_umlauts(park.get('name') or '')
+                    
                     # Extract just the number from reference (e.g. "AT-0001" -> "1", "SG-0014" -> "14")
                     park_number = ref.split('-')[-1].lstrip('0') if '-' in ref else ref
                     if not park_number:  # If all zeros, use "0"
                         park_number = "0"
                     
                     # Format name for GPS display (number + name, truncate if needed)
-                    display_name = f"{park_number} {clean_name}"
-                    if len(display_name) > 50:  # Reasonable limit for GPS display
-                        display_name = display_name[:47] + "..."
-                    
-                    gps_entry = {
-                        'Group': group_info['group'],
-                        'Group Name': group_info['group_name'],
-                        'Name': display_name,
-                        'Date': current_date,
-                        'Time': '00:00:00',
-                        'Latitude': lat,
-                        'Longitude': lon,
-                        'Altitude': '',
-                        'Alarm': 'OFF'
-                    }
+                    display_name = fit_display_name(f"{park_number} ", clean_name)
                     
-                    country_parks.append(gps_entry)
-                    location_parks.append(gps_entry)
-                    
-                except Exception as e:
-                    print(f"      ❌ Error processing park: {e}")
+                    # Same column order as GPS_FIELDNAMES
+                    location_parks.append((
+                        group, group_name, display_name, current_date, '00:00:00',
+                        lat, lon, '', 'OFF'
+                    ))
+                
+                if not location_parks:
                     continue
-            
-            # Create location-specific file
-            if location_parks:
+                
+                # Append to the country-wide file
+                if country_file is None:
+                    # Directories only for countries with parks, POTA-GPS included
+                    os.makedirs(f"POTA-GPS/{country_name}", exist_ok=True)
+                    country_file = open(country_filename, 'w', encoding='utf-8', newline='')
+                    country_file.write(GPS_HEADER_LINE)
+                country_file.writelines(gps_csv_lines(location_parks))
+                country_park_count += len(location_parks)
+                
+                # Create location-specific file
                 location_filename = f"POTA-GPS/{country_name}/{descriptor}.csv"
-                location_files[descriptor] = {
-                    'filename': location_filename,
-                    'parks': location_parks,
-                    'location_name': location_name
-                }
-            
-            # Small delay to be nice to API
-            time.sleep(0.1)
-        
-        # Write country-wide file
-        if country_parks:
-            country_filename = f"POTA-GPS/pota_{country_code.lower()}_all.csv"
-            write_gps_csv(country_filename, country_parks)
-            print(f"   ✅ Created {country_filename} with {len(country_parks)} parks")
+                write_gps_csv(location_filename, location_parks)
+                location_count += 1
+                print(f"      📁 Created {descriptor}.csv with {len(location_parks)} parks")
+        finally:
+            if country_file is not None:
+                country_file.close()
         
-        # Write location-specific files
-        for descriptor, file_info in location_files.items():
-            write_gps_csv(file_info['filename'], file_info['parks'])
-            print(f"      📁 Created {descriptor}.csv with {len(file_info['parks'])} parks")
+        if country_park_count:
+            country_files[country_code] = country_filename
+            print(f"   ✅ Created {country_filename} with {country_park_count} parks")
         
         country_totals[country_code] = {
             'name': country_name,
-            'parks': len(country_parks),
-            'locations': len(location_files)
+            'parks': country_park_count,
+            'locations': location_count
         }
     
     # Create combined master file
     print(f"\n🌍 Creating master combined file...")
-    all_parks = []
     
-    for country_code in ['AT', 'SK', 'SG']:
-        country_file = f"POTA-GPS/pota_{country_code.lower()}_all.csv"
-        if Path(country_file).exists():
-            with open(country_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    all_parks.append(row)
-    
-    if all_parks:
-        write_gps_csv('POTA-GPS/pota_all_countries.csv', all_parks)
-        print(f"   ✅ Created master file with {len(all_parks)} parks")
+    # Country files written above, no second pass over the parks
+    master_park_count = sum(country_totals[country_code]['parks'] for country_code in country_files)
+    if master_park_count:
+        combine_gps_csvs('POTA-GPS/pota_all_countries.csv', [
+            country_files[country_code] for country_code in ['AT', 'SK', 'SG'] if country_code in country_files
+        ])
+        print(f"   ✅ Created master file with {master_park_count} parks")
     
     # Print summary
     total_parks = sum(stats['parks'] for stats in country_totals.values())
@@ -256,21 +214,6 @@ def create_pota_gps_files():
     
     return total_parks
 
-def write_gps_csv(filename, parks_data):
-    """Write parks data in GPS CSV format."""
-    if not parks_data:
-        return
-    
-    # GPS CSV header
-    fieldnames = ['Group', 'Group Name', 'Name', 'Date', 'Time', 'Latitude', 'Longitude', 'Altitude', 'Alarm']
-    
-    with open(filename, 'w', encoding='utf-8', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for park in parks_data:
-            writer.writerow(park)
-
 def main():
     print("POTA Parks GPS Format Generator")
     print("Uses official POTA API to create GPS format files")
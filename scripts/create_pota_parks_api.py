@@ -4,38 +4,52 @@ POTA Parks API Generator for Austria, Slovakia, and Singapore
 Uses official POTA API endpoints to get all registered parks with precise coordinates
 """
 
-import json
+import functools
 import csv
-import subprocess
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys
 import re
 
-def convert_umlauts(text):
-    """Convert umlauts and special characters to ASCII equivalents."""
-    if not text:
-        return text
-    
-    umlaut_map = {
-        'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue',
-        'ß': 'ss', 'é': 'e', 'É': 'E', 'è': 'e', 'È': 'E',
-        'á': 'a', 'Á': 'A', 'à': 'a', 'À': 'A', 'í': 'i', 'Í': 'I',
-        'ì': 'i', 'Ì': 'I', 'ó': 'o', 'Ó': 'O', 'ò': 'o', 'Ò': 'O',
-        'ú': 'u', 'Ú': 'U', 'ù': 'u', 'Ù': 'U', 'ñ': 'n', 'Ñ': 'N',
-        'ç': 'c', 'Ç': 'C', '–': '-', '—': '-', '"': '"', '"': '"',
-        ''': "'", ''': "'", '…': '...', 'ř': 'r', 'Ř': 'R',
-        'ľ': 'l', 'Ľ': 'L', 'š': 's', 'Š': 'S', 'ť': 't', 'Ť': 'T',
-        'ž': 'z', 'Ž': 'Z', 'ý': 'y', 'Ý': 'Y', 'č': 'c', 'Č': 'C',
-        'ď': 'd', 'Ď': 'D', 'ň': 'n', 'Ň': 'N', 'ô': 'o', 'Ô': 'O'
-    }
-    
-    result = text
-    for umlaut, replacement in umlaut_map.items():
-        result = result.replace(umlaut, replacement)
-    
-    return result
+from gps_common import LOCATIONS_MAX_AGE, MAX_PARALLEL_FETCHES, PARKS_MAX_AGE, SESSION, convert_umlauts, fetch_json_cached
+
+if SESSION is None:
+    print("Warning: requests module not available. POTA functionality will be limited.")
+    print("Install with: apt install python3-requests")
+
+# memory-channels-processor format plus POTA statistics
+PARK_FIELDNAMES = [
+    'callsign', 'name', 'band', 'freq_tx', 'freq_rx', 'ctcss_tx', 'ctcss_rx',
+    'c4fm', 'dmr', 'dmr_id', 'dmr_cc', 'dstar', 'dstar_rpt1', 'dstar_rpt2',
+    'fm', 'landmark', 'state', 'country', 'country_code', 'loc_exact',
+    'lat', 'long', 'locator', 'sea_level', 'skip', 'scan_group',
+    'source_id', 'source_name', 'source_provider', 'source_type',
+    'source_license', 'source_url', 'offset', 'dup', 'ctcss',
+    'simplex', 'split', 'multimode', 'name_formatted', 'distance', 'heading',
+    'attempts', 'activations', 'qsos', 'grid'
+]
+
+# Icom format
+ICOM_HEADER = [
+    'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
+    'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
+    'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
+]
+
+# Group assignments
+GROUP_MAP = {
+    'AT': {'number': 75, 'name': 'POTA-AT', 'utc': '+1:00'},
+    'SK': {'number': 76, 'name': 'POTA-SK', 'utc': '+1:00'},
+    'SG': {'number': 77, 'name': 'POTA-SG', 'utc': '+8:00'}
+}
 
+# 1 MiB output buffer, flushes thousands of park rows per write
+IO_BUFFER_SIZE = 1 << 20
+
+ORD_A = ord('A')
+
+# Parks without coordinates share grid squares, decode each locator once
+@functools.lru_cache(maxsize=None)
 def maidenhead_to_latlon(grid):
     """Convert Maidenhead grid locator to latitude/longitude."""
     if not grid or len(grid) < 4:
@@ -47,8 +61,8 @@ def maidenhead_to_latlon(grid):
         
         # Field (first 2 letters): 20° longitude, 10° latitude
         if len(grid) >= 2:
-            lon_field = (ord(grid[0]) - ord('A')) * 20 - 180
-            lat_field = (ord(grid[1]) - ord('A')) * 10 - 90
+            lon_field = (ord(grid[0]) - ORD_A) * 20 - 180
+            lat_field = (ord(grid[1]) - ORD_A) * 10 - 90
         else:
             return None, None
         
@@ -61,8 +75,8 @@ def maidenhead_to_latlon(grid):
         
         # Subsquare (next 2 letters): 5' longitude, 2.5' latitude
         if len(grid) >= 6:
-            lon_subsquare = (ord(grid[4]) - ord('A')) * (5/60)
-            lat_subsquare = (ord(grid[5]) - ord('A')) * (2.5/60)
+            lon_subsquare = (ord(grid[4]) - ORD_A) * (5/60)
+            lat_subsquare = (ord(grid[5]) - ORD_A) * (2.5/60)
         else:
             lon_subsquare = lat_subsquare = 0
         
@@ -84,19 +98,13 @@ def maidenhead_to_latlon(grid):
 
 def fetch_pota_locations():
     """Fetch POTA program locations to get descriptors for countries."""
+    if SESSION is None:
+        print("❌ Error: requests module not available for POTA API access")
+        return {}
+    
     try:
         print("📡 Fetching POTA program locations...")
-        result = subprocess.run(
-            ['curl', '-s', 'https://api.pota.app/programs/locations'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            print(f"❌ Error fetching locations: {result.stderr}")
-            return {}
-        
-        data = json.loads(result.stdout)
+        data = fetch_json_cached('https://api.pota.app/programs/locations', LOCATIONS_MAX_AGE)
         
         # Extract location descriptors for target countries
         countries = {}
@@ -132,25 +140,18 @@ def fetch_pota_locations():
 
 def fetch_parks_for_location(descriptor):
     """Fetch all parks for a specific location descriptor."""
+    if SESSION is None:
+        return []
+    
     try:
-        result = subprocess.run(
-            ['curl', '-s', f'https://api.pota.app/location/parks/{descriptor}'],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        if result.returncode != 0:
-            return []
-        
-        parks_data = json.loads(result.stdout)
-        return parks_data
+        return fetch_json_cached(f'https://api.pota.app/location/parks/{descriptor}', PARKS_MAX_AGE)
         
     except Exception as e:
         print(f"❌ Error fetching parks for {descriptor}: {e}")
         return []
 
 def create_comprehensive_pota_parks():
-    """Create comprehensive POTA parks database using API."""
+    """Create comprehensive POTA parks database and Icom GPS waypoints using API."""
     
     print("🏞️ POTA Parks API Generator")
     print("=" * 50)
@@ -159,161 +160,146 @@ def create_comprehensive_pota_parks():
     countries = fetch_pota_locations()
     if not countries:
         print("❌ Failed to fetch country locations")
-        return 0
+        return 0, 0
     
-    all_parks = []
+    total_parks = 0
+    icom_count = 0
     country_stats = {}
     
-    # Process each country
-    for country_code, country_info in countries.items():
-        country_name = country_info['name']
-        locations = country_info['locations']
-        
-        print(f"\n🇦🇹 Processing {country_name} ({country_code})...")
-        print(f"   Found {len(locations)} locations with parks")
-        
-        country_parks = []
-        
-        # Fetch parks for each location
-        for location in locations:
-            descriptor = location['descriptor']
-            location_name = location['name']
-            expected_parks = location['parks']
-            
-            print(f"   📍 {descriptor}: {location_name} ({expected_parks} parks)")
-            
-            parks = fetch_parks_for_location(descriptor)
+    # Write both formats as parks are produced, only counters stay in memory. The
+    # rows go to temporary files so a failed or empty run keeps the previous outputs
+    parks_part = Path('pota_parks_api.csv.part')
+    icom_part = Path('pota_parks_api_icom.csv.part')
+    
+    try:
+        with open(parks_part, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as csvfile, \
+             open(icom_part, 'w', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as icomfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(PARK_FIELDNAMES)
+            icom_writer = csv.writer(icomfile)
+            icom_writer.writerow(ICOM_HEADER)
             
-            for park in parks:
-                try:
-                    ref = park.get('reference', '')
-                    name = park.get('name', '')
-                    lat = park.get('latitude', 0)
-                    lon = park.get('longitude', 0)
-                    grid = park.get('grid', '')
-                    location_desc = park.get('locationDesc', '')
-                    attempts = park.get('attempts', 0)
-                    activations = park.get('activations', 0)
-                    qsos = park.get('qsos', 0)
-                    
-                    # Clean names
-                    clean_ref = convert_umlauts(ref)
-                    clean_name = convert_umlauts(name)
-                    clean_location = convert_umlauts(location_desc)
-                    
-                    # Use provided coordinates, fallback to grid conversion if needed
-                    final_lat, final_lon = lat, lon
-                    
-                    if (not lat or not lon or lat == 0 or lon == 0) and grid:
-                        print(f"      Converting grid {grid} to coordinates...")
-                        grid_lat, grid_lon = maidenhead_to_latlon(grid)
-                        if grid_lat and grid_lon:
-                            final_lat, final_lon = grid_lat, grid_lon
+            # Process each country
+            for country_code, country_info in countries.items():
+                country_name = country_info['name']
+                locations = country_info['locations']
+                
+                print(f"\n🇦🇹 Processing {country_name} ({country_code})...")
+                print(f"   Found {len(locations)} locations with parks")
+                
+                country_park_count = 0
+                group_info = GROUP_MAP.get(country_code)
+                
+                # Fetch parks for all locations concurrently, results keep location order
+                descriptors = [location['descriptor'] for location in locations]
+                with ThreadPoolExecutor(max_workers=MAX_PARALLEL_FETCHES) as executor:
+                    location_parks = list(executor.map(fetch_parks_for_location, descriptors))
+                
+                for location, parks in zip(locations, location_parks):
+                    descriptor = location['descriptor']
+                    location_name = location['name']
+                    expected_parks = location['parks']
+                    source_url = f'https://api.pota.app/location/parks/{descriptor}'
                     
-                    # Skip if no valid coordinates
-                    if not final_lat or not final_lon or final_lat == 0 or final_lon == 0:
-                        print(f"      ⚠️  Skipping {ref}: No valid coordinates")
-                        continue
+                    print(f"   📍 {descriptor}: {location_name} ({expected_parks} parks)")
                     
-                    park_data = {
-                        'callsign': clean_ref,
-                        'name': clean_name,
-                        'band': 'gps',
-                        'freq_tx': '',
-                        'freq_rx': '',
-                        'ctcss_tx': '',
-                        'ctcss_rx': '',
-                        'c4fm': 'False',
-                        'dmr': 'False',
-                        'dmr_id': '',
-                        'dmr_cc': '',
-                        'dstar': 'False',
-                        'dstar_rpt1': '',
-                        'dstar_rpt2': '',
-                        'fm': 'False',
-                        'landmark': clean_location,
-                        'state': location_name,
-                        'country': country_name,
-                        'country_code': country_code,
-                        'loc_exact': 'True',
-                        'lat': final_lat,
-                        'long': final_lon,
-                        'locator': grid,
-                        'sea_level': '',
-                        'skip': 'False',
-                        'scan_group': '',
-                        'source_id': 'pota-api',
-                        'source_name': 'POTA API',
-                        'source_provider': 'Parks on the Air',
-                        'source_type': 'api',
-                        'source_license': '',
-                        'source_url': f'https://api.pota.app/location/parks/{descriptor}',
-                        'offset': '0',
-                        'dup': '',
-                        'ctcss': 'False',
-                        'simplex': 'True',
-                        'split': 'False',
-                        'multimode': 'False',
-                        'name_formatted': f"{clean_ref} {clean_name}",
-                        'distance': '',
-                        'heading': '',
-                        'attempts': attempts,
-                        'activations': activations,
-                        'qsos': qsos,
-                        'grid': grid
-                    }
+                    # Rows for this location, written with one writerows call each
+                    park_rows = []
+                    icom_rows = []
                     
-                    country_parks.append(park_data)
-                    all_parks.append(park_data)
+                    for park in parks:
+                        try:
+                            ref = park.get('reference', '')
+                            name = park.get('name', '')
+                            lat = park.get('latitude', 0)
+                            lon = park.get('longitude', 0)
+                            grid = park.get('grid', '')
+                            location_desc = park.get('locationDesc', '')
+                            attempts = park.get('attempts', 0)
+                            activations = park.get('activations', 0)
+                            qsos = park.get('qsos', 0)
+                            
+                            # Clean names
+                            clean_ref = convert_umlauts(ref)
+                            clean_name = convert_umlauts(name)
+                            clean_location = convert_umlauts(location_desc)
+                            
+                            # Use provided coordinates, fallback to grid conversion if needed
+                            final_lat, final_lon = lat, lon
+                            
+                            if (not lat or not lon or lat == 0 or lon == 0) and grid:
+                                print(f"      Converting grid {grid} to coordinates...")
+                                grid_lat, grid_lon = maidenhead_to_latlon(grid)
+                                if grid_lat and grid_lon:
+                                    final_lat, final_lon = grid_lat, grid_lon
+                            
+                            # Skip if no valid coordinates
+                            if not final_lat or not final_lon or final_lat == 0 or final_lon == 0:
+                                print(f"      ⚠️  Skipping {ref}: No valid coordinates")
+                                continue
+                            
+                            # Same column order as PARK_FIELDNAMES
+                            park_data = (
+                                clean_ref, clean_name, 'gps', '', '', '', '',
+                                'False', 'False', '', '', 'False', '', '',
+                                'False', clean_location, location_name, country_name, country_code, 'True',
+                                final_lat, final_lon, grid, '', 'False', '',
+                                'pota-api', 'POTA API', 'Parks on the Air', 'api',
+                                '', source_url, '0', '', 'False',
+                                'True', 'False', 'False', f"{clean_ref} {clean_name}", '', '',
+                                attempts, activations, qsos, grid
+                            )
+                            
+                            park_rows.append(park_data)
+                            
+                            # Icom GPS waypoint, names truncated for display (16 chars max)
+                            if group_info:
+                                icom_rows.append((
+                                    group_info['number'], group_info['name'], clean_ref[:16], clean_name[:16],
+                                    '', '', '', '', '', 'GPS', '', '', '', 'Exact',
+                                    final_lat, final_lon, group_info['utc']
+                                ))
+                            
+                        except Exception as e:
+                            print(f"      ❌ Error processing park: {e}")
+                            continue
                     
-                except Exception as e:
-                    print(f"      ❌ Error processing park: {e}")
-                    continue
-            
-            # Small delay to be nice to API
-            time.sleep(0.1)
-        
-        country_stats[country_code] = {
-            'name': country_name,
-            'parks': len(country_parks),
-            'locations': len(locations)
-        }
-        
-        print(f"   ✅ Processed {len(country_parks)} parks for {country_name}")
+                    writer.writerows(park_rows)
+                    icom_writer.writerows(icom_rows)
+                    country_park_count += len(park_rows)
+                    icom_count += len(icom_rows)
+                
+                country_stats[country_code] = {
+                    'name': country_name,
+                    'parks': country_park_count,
+                    'locations': len(locations)
+                }
+                
+                print(f"   ✅ Processed {country_park_count} parks for {country_name}")
+                total_parks += country_park_count
+    except Exception:
+        parks_part.unlink(missing_ok=True)
+        icom_part.unlink(missing_ok=True)
+        raise
     
-    if not all_parks:
+    if not total_parks:
+        parks_part.unlink()
+        icom_part.unlink()
         print("❌ No parks data retrieved")
-        return 0
+        return 0, 0
     
-    # Write comprehensive CSV
-    fieldnames = [
-        'callsign', 'name', 'band', 'freq_tx', 'freq_rx', 'ctcss_tx', 'ctcss_rx',
-        'c4fm', 'dmr', 'dmr_id', 'dmr_cc', 'dstar', 'dstar_rpt1', 'dstar_rpt2',
-        'fm', 'landmark', 'state', 'country', 'country_code', 'loc_exact',
-        'lat', 'long', 'locator', 'sea_level', 'skip', 'scan_group',
-        'source_id', 'source_name', 'source_provider', 'source_type',
-        'source_license', 'source_url', 'offset', 'dup', 'ctcss',
-        'simplex', 'split', 'multimode', 'name_formatted', 'distance', 'heading',
-        'attempts', 'activations', 'qsos', 'grid'
-    ]
-    
-    with open('pota_parks_api.csv', 'w', encoding='utf-8', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for park in all_parks:
-            writer.writerow(park)
+    parks_part.replace('pota_parks_api.csv')
+    icom_part.replace('pota_parks_api_icom.csv')
     
     # Print statistics
-    total_parks = len(all_parks)
     print(f"\n✅ Successfully created {total_parks} POTA parks")
     for country_code, stats in country_stats.items():
         print(f"   🏞️ {stats['name']}: {stats['parks']} parks from {stats['locations']} locations")
     
-    return total_parks
+    return total_parks, icom_count
 
 def create_icom_format():
-    """Convert to Icom ID-52PLUS GPS format."""
+    """Convert an existing pota_parks_api.csv to Icom ID-52PLUS GPS format."""
     
     print("\n🎯 Converting to Icom ID-52PLUS format...")
     
@@ -321,67 +307,35 @@ def create_icom_format():
         print("❌ pota_parks_api.csv not found")
         return 0
     
-    # Group assignments
-    group_map = {
-        'AT': {'number': 75, 'name': 'POTA-AT', 'utc': '+1:00'},
-        'SK': {'number': 76, 'name': 'POTA-SK', 'utc': '+1:00'},
-        'SG': {'number': 77, 'name': 'POTA-SG', 'utc': '+8:00'}
-    }
-    
-    # Icom format
-    icom_header = [
-        'Group No', 'Group Name', 'Name', 'Sub Name', 'Repeater Call Sign',
-        'Gateway Call Sign', 'Frequency', 'Dup', 'Offset', 'Mode', 'TONE',
-        'Repeater Tone', 'RPT1USE', 'Position', 'Latitude', 'Longitude', 'UTC Offset'
-    ]
-    
     processed_count = 0
     
     with open('pota_parks_api_icom.csv', 'w', encoding='utf-8', newline='') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=icom_header)
-        writer.writeheader()
+        writer = csv.writer(outfile)
+        writer.writerow(ICOM_HEADER)
         
-        with open('pota_parks_api.csv', 'r', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile)
+        with open('pota_parks_api.csv', 'r', encoding='utf-8', newline='', buffering=IO_BUFFER_SIZE) as infile:
+            reader = csv.reader(infile)
+            
+            # Resolve column positions once from the header
+            columns = {name: i for i, name in enumerate(next(reader))}
+            country_idx = columns['country_code']
+            ref_idx = columns['callsign']
+            name_idx = columns['name']
+            lat_idx = columns['lat']
+            lon_idx = columns['long']
             
             for row in reader:
                 try:
-                    country_code = row['country_code']
-                    park_ref = row['callsign']
-                    park_name = row['name']
-                    lat = row['lat']
-                    lon = row['long']
-                    
-                    if country_code not in group_map:
+                    group_info = GROUP_MAP.get(row[country_idx])
+                    if group_info is None:
                         continue
                     
-                    group_info = group_map[country_code]
-                    
-                    # Truncate names for Icom display (16 chars max)
-                    name = park_ref[:16]
-                    sub_name = park_name[:16]
-                    
-                    icom_row = {
-                        'Group No': group_info['number'],
-                        'Group Name': group_info['name'],
-                        'Name': name,
-                        'Sub Name': sub_name,
-                        'Repeater Call Sign': '',
-                        'Gateway Call Sign': '',
-                        'Frequency': '',  # GPS waypoint
-                        'Dup': '',
-                        'Offset': '',
-                        'Mode': 'GPS',
-                        'TONE': '',
-                        'Repeater Tone': '',
-                        'RPT1USE': '',
-                        'Position': 'Exact',
-                        'Latitude': lat,
-                        'Longitude': lon,
-                        'UTC Offset': group_info['utc']
-                    }
-                    
-                    writer.writerow(icom_row)
+                    # Truncate names for Icom display (16 chars max), no frequency for GPS waypoints
+                    writer.writerow((
+                        group_info['number'], group_info['name'], row[ref_idx][:16], row[name_idx][:16],
+                        '', '', '', '', '', 'GPS', '', '', '', 'Exact',
+                        row[lat_idx], row[lon_idx], group_info['utc']
+                    ))
                     processed_count += 1
                     
                 except Exception as e:
@@ -398,11 +352,9 @@ def main():
     print("🌐 Source: https://api.pota.app/")
     print()
     
-    park_count = create_comprehensive_pota_parks()
+    park_count, icom_count = create_comprehensive_pota_parks()
     
     if park_count > 0:
-        icom_count = create_icom_format()
-        
         print(f"\n🎉 Successfully processed {park_count} POTA parks")
         print(f"📱 Created {icom_count} GPS waypoints for Icom ID-52PLUS")
         
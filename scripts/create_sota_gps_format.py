@@ -6,34 +6,17 @@ Compatible with POTA GPS format for consistent Icom ID-52PLUS usage
 """
 
 import csv
+import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
 from datetime import datetime
 
-def convert_umlauts(text):
-    """Convert German, Slovak and special characters to ASCII equivalents."""
-    if not text:
-        return text
-    
-    umlaut_map = {
-        'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue',
-        'ß': 'ss', 'é': 'e', 'É': 'E', 'è': 'e', 'È': 'E',
-        'á': 'a', 'Á': 'A', 'à': 'a', 'À': 'A', 'í': 'i', 'Í': 'I',
-        'ì': 'i', 'Ì': 'I', 'ó': 'o', 'Ó': 'O', 'ò': 'o', 'Ò': 'O',
-        'ú': 'u', 'Ú': 'U', 'ù': 'u', 'Ù': 'U', 'ñ': 'n', 'Ñ': 'N',
-        'ç': 'c', 'Ç': 'C', '–': '-', '—': '-', '"': '"', '"': '"',
-        ''': "'", ''': "'", '…': '...', 'ř': 'r', 'Ř': 'R',
-        'ľ': 'l', 'Ľ': 'L', 'š': 's', 'Š': 'S', 'ť': 't', 'Ť': 'T',
-        'ž': 'z', 'Ž': 'Z', 'ý': 'y', 'Ý': 'Y', 'č': 'c', 'Č': 'C',
-        'ď': 'd', 'Ď': 'D', 'ň': 'n', 'Ň': 'N', 'ô': 'o', 'Ô': 'O'
-    }
-    
-    result = text
-    for umlaut, replacement in umlaut_map.items():
-        result = result.replace(umlaut, replacement)
-    
-    return result
+from gps_common import combine_gps_csvs, convert_umlauts, fit_display_name, read_rows_with_defaults, write_gps_csv
+
+# Columns read from sota_summits.csv, with the value used when the file lacks one
+SOTA_COLUMN_DEFAULTS = {'country_code': '', 'name': '', 'lat': '0', 'long': '0'}
 
 def generate_sota_data():
     """Generate SOTA summits data using memory-channels-processor."""
@@ -41,7 +24,7 @@ def generate_sota_data():
     # Try to find memory-channels-processor
     memory_processor = None
     
-    if subprocess.run(['which', 'memory-channels-processor'], capture_output=True).returncode == 0:
+    if shutil.which('memory-channels-processor'):
         memory_processor = 'memory-channels-processor'
     elif Path('/mnt/c/Users/sebastian.schiegl/Github/memory-channels-processor/Scripts/memory-channels-processor.exe').exists():
         memory_processor = '/mnt/c/Users/sebastian.schiegl/Github/memory-channels-processor/Scripts/memory-channels-processor.exe'
@@ -95,12 +78,6 @@ def create_sota_gps_files():
             print("Failed to generate SOTA data")
             return 0
     
-    # Create output directories
-    Path('SOTA-GPS').mkdir(exist_ok=True)
-    Path('SOTA-GPS/Austria').mkdir(exist_ok=True)
-    Path('SOTA-GPS/Slovakia').mkdir(exist_ok=True)
-    Path('SOTA-GPS/Singapore').mkdir(exist_ok=True)
-    
     current_date = datetime.now().strftime('%m/%d/%Y')
     country_totals = {}
     
@@ -109,17 +86,22 @@ def create_sota_gps_files():
     
     try:
         with open('sota_summits.csv', 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
+            index, rows = read_rows_with_defaults(csv.reader(csvfile), SOTA_COLUMN_DEFAULTS)
+            
+            country_code_idx = index['country_code']
+            name_idx = index['name']
+            lat_idx = index['lat']
+            long_idx = index['long']
             
-            for row in reader:
-                country_code = row.get('country_code', '').upper()
+            for row in rows:
+                country_code = row[country_code_idx].upper()
                 if country_code not in group_map:
                     continue
                 
                 try:
-                    name = row.get('name', '')
-                    lat = float(row.get('lat', 0))
-                    lon = float(row.get('long', 0))
+                    name = row[name_idx]
+                    lat = float(row[lat_idx])
+                    lon = float(row[long_idx])
                     
                     if not name or lat == 0 or lon == 0:
                         continue
@@ -128,25 +110,15 @@ def create_sota_gps_files():
                     clean_name = convert_umlauts(name)
                     
                     # Format for GPS display (summit name, truncate if needed)
-                    display_name = clean_name
-                    if len(display_name) > 50:
-                        display_name = display_name[:47] + "..."
+                    display_name = fit_display_name('', clean_name)
                     
                     group_info = group_map[country_code]
                     
-                    gps_entry = {
-                        'Group': group_info['group'],
-                        'Group Name': group_info['group_name'],
-                        'Name': display_name,
-                        'Date': current_date,
-                        'Time': '00:00:00',
-                        'Latitude': lat,
-                        'Longitude': lon,
-                        'Altitude': '',
-                        'Alarm': 'OFF'
-                    }
-                    
-                    country_summits[country_code].append(gps_entry)
+                    # Same column order as GPS_FIELDNAMES
+                    country_summits[country_code].append((
+                        group_info['group'], group_info['group_name'], display_name,
+                        current_date, '00:00:00', lat, lon, '', 'OFF'
+                    ))
                     
                 except (ValueError, KeyError) as e:
                     print(f"Skipping invalid summit entry: {e}")
@@ -160,6 +132,7 @@ def create_sota_gps_files():
         return 0
     
     total_summits = 0
+    country_files = []  # Country files written above, for the combined master file
     
     # Write country files
     for country_code, summits in country_summits.items():
@@ -169,13 +142,18 @@ def create_sota_gps_files():
         country_name = {'AUT': 'Austria', 'SVK': 'Slovakia', 'SGP': 'Singapore'}[country_code]
         group_info = group_map[country_code]
         
+        # Create the output directory for the region file, SOTA-GPS included
+        os.makedirs(f"SOTA-GPS/{country_name}", exist_ok=True)
+        
         # Write country-wide file
         country_filename = f"SOTA-GPS/sota_{country_code.lower()}_all.csv"
         write_gps_csv(country_filename, summits)
+        country_files.append(country_filename)
         
         # Create region-specific files (simplified - one file per country for SOTA)
+        # Same content as the country-wide file, copied instead of formatted again
         region_filename = f"SOTA-GPS/{country_name}/sota_{country_code.lower()}.csv"
-        write_gps_csv(region_filename, summits)
+        shutil.copyfile(country_filename, region_filename)
         
         country_totals[country_code] = {
             'name': country_name,
@@ -188,13 +166,11 @@ def create_sota_gps_files():
     
     # Create master combined file
     print("Creating master combined file...")
-    all_summits = []
-    for summits in country_summits.values():
-        all_summits.extend(summits)
     
-    if all_summits:
-        write_gps_csv('SOTA-GPS/sota_all_countries.csv', all_summits)
-        print(f"Created master file with {len(all_summits)} summits")
+    # Country files written above, no second pass over the summits
+    if country_files:
+        combine_gps_csvs('SOTA-GPS/sota_all_countries.csv', country_files)
+        print(f"Created master file with {total_summits} summits")
     
     # Print summary
     print(f"\nSuccessfully processed {total_summits} SOTA summits")
@@ -203,21 +179,6 @@ def create_sota_gps_files():
     
     return total_summits
 
-def write_gps_csv(filename, summits_data):
-    """Write summits data in GPS CSV format."""
-    if not summits_data:
-        return
-    
-    # GPS CSV header (same as POTA format)
-    fieldnames = ['Group', 'Group Name', 'Name', 'Date', 'Time', 'Latitude', 'Longitude', 'Altitude', 'Alarm']
-    
-    with open(filename, 'w', encoding='utf-8', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for summit in summits_data:
-            writer.writerow(summit)
-
 def main():
     print("SOTA Summits GPS Format Generator")
     print("Uses memory-channels-processor to create GPS format files")
@@ -6,45 +6,49 @@ Compatible with gpsexample.csv format
 """
 
 import csv
+import functools
 import subprocess
 import sys
 import argparse
-import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-import time
 
-try:
-    import requests
-except ImportError:
+from gps_common import (
+    LOCATIONS_MAX_AGE, MAX_PARALLEL_FETCHES, PARKS_MAX_AGE, SESSION, combine_gps_csvs,
+    convert_umlauts, fetch_json_cached, fit_display_name, read_rows_with_defaults, write_gps_csv
+)
+
+if SESSION is None:
     print("Warning: requests module not available. POTA functionality will be limited.")
     print("Install with: apt install python3-requests")
-    requests = None
 
-def convert_umlauts(text):
-    """Convert German, Slovak and special characters to ASCII equivalents."""
-    if not text:
-        return text
-    
-    umlaut_map = {
-        'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue',
-        'ß': 'ss', 'é': 'e', 'É': 'E', 'è': 'e', 'È': 'E',
-        'á': 'a', 'Á': 'A', 'à': 'a', 'À': 'A', 'í': 'i', 'Í': 'I',
-        'ì': 'i', 'Ì': 'I', 'ó': 'o', 'Ó': 'O', 'ò': 'o', 'Ò': 'O',
-        'ú': 'u', 'Ú': 'U', 'ù': 'u', 'Ù': 'U', 'ñ': 'n', 'Ñ': 'N',
-        'ç': 'c', 'Ç': 'C', '–': '-', '—': '-', '\"': '\"', '\"': '\"',
-        ''': "'", ''': "'", '…': '...', 'ř': 'r', 'Ř': 'R',
-        'ľ': 'l', 'Ľ': 'L', 'š': 's', 'Š': 'S', 'ť': 't', 'Ť': 'T',
-        'ž': 'z', 'Ž': 'Z', 'ý': 'y', 'Ý': 'Y', 'č': 'c', 'Č': 'C',
-        'ď': 'd', 'Ď': 'D', 'ň': 'n', 'Ň': 'N', 'ô': 'o', 'Ô': 'O'
-    }
-    
-    result = text
-    for umlaut, replacement in umlaut_map.items():
-        result = result.replace(umlaut, replacement)
-    
-    return result
+# Group letter, group name and output directory per country, POTA by prefix, SOTA by ISO code
+POTA_COUNTRIES = {
+    'AT': ('U', 'POTA-AT', 'Austria'),
+    'SK': ('V', 'POTA-SK', 'Slovakia'),
+    'SG': ('W', 'POTA-SG', 'Singapore')
+}
+SOTA_COUNTRIES = {
+    'AUT': ('X', 'SOTA-AT', 'Austria'),
+    'SVK': ('Y', 'SOTA-SK', 'Slovakia'),
+    'SGP': ('Z', 'SOTA-SG', 'Singapore')
+}
+
+# SOTA country code for each --countries choice
+SOTA_COUNTRY_CODES = {'AT': 'AUT', 'SK': 'SVK', 'SG': 'SGP'}
 
+# Columns read from sota_summits.csv, with the value used when the file lacks one
+SOTA_COLUMN_DEFAULTS = {'country_code': '', 'name': '', 'lat': '0', 'long': '0'}
+
+# Character codes the Maidenhead fields count from
+ORD_A = ord('A')
+ORD_0 = ord('0')
+
+# Parks in the same area share a grid square, convert each distinct grid once
+@functools.lru_cache(maxsize=None)
 def maidenhead_to_gps(grid):
     """Convert Maidenhead grid square to GPS coordinates."""
     if not grid or len(grid) < 4:
@@ -54,17 +58,17 @@ def maidenhead_to_gps(grid):
         grid = grid.upper()
         
         # Get longitude from first two characters (A-R)
-        lon = (ord(grid[0]) - ord('A')) * 20 - 180
-        lon += (ord(grid[2]) - ord('0')) * 2
+        lon = (ord(grid[0]) - ORD_A) * 20 - 180
+        lon += (ord(grid[2]) - ORD_0) * 2
         
         # Get latitude from second two characters (A-R) 
-        lat = (ord(grid[1]) - ord('A')) * 10 - 90
-        lat += (ord(grid[3]) - ord('0')) * 1
+        lat = (ord(grid[1]) - ORD_A) * 10 - 90
+        lat += (ord(grid[3]) - ORD_0) * 1
         
         # Add subsquare precision if available
         if len(grid) >= 6:
-            lon += (ord(grid[4]) - ord('A')) * (2.0/24.0)
-            lat += (ord(grid[5]) - ord('A')) * (1.0/24.0)
+            lon += (ord(grid[4]) - ORD_A) * (2.0/24.0)
+            lat += (ord(grid[5]) - ORD_A) * (1.0/24.0)
         else:
             # Center of grid square
             lon += 1.0  # Half of 2 degree square
@@ -77,7 +81,7 @@ def maidenhead_to_gps(grid):
 
 def find_memory_processor():
     """Find memory-channels-processor executable."""
-    if subprocess.run(['which', 'memory-channels-processor'], capture_output=True).returncode == 0:
+    if shutil.which('memory-channels-processor'):
         return 'memory-channels-processor'
     elif Path('/mnt/c/Users/sebastian.schiegl/Github/memory-channels-processor/Scripts/memory-channels-processor.exe').exists():
         return '/mnt/c/Users/sebastian.schiegl/Github/memory-channels-processor/Scripts/memory-channels-processor.exe'
@@ -88,16 +92,13 @@ def find_memory_processor():
 
 def fetch_pota_locations():
     """Fetch POTA location data from API."""
-    if requests is None:
+    if SESSION is None:
         print("Error: requests module not available for POTA API access")
         return []
         
     try:
         print("Fetching POTA locations from API...")
-        response = requests.get('https://api.pota.app/programs/locations', timeout=30)
-        response.raise_for_status()
-        
-        locations_data = response.json()
+        locations_data = fetch_json_cached('https://api.pota.app/programs/locations', LOCATIONS_MAX_AGE)
         
         # Filter for our target countries - need to look inside entities/locations
         target_locations = []
@@ -115,32 +116,19 @@ def fetch_pota_locations():
         print(f"Error fetching POTA locations: {e}")
         return []
 
-def fetch_parks_for_location(descriptor, max_retries=3):
-    """Fetch parks for a specific location with retry logic."""
-    if requests is None:
+def fetch_parks_for_location(descriptor):
+    """Fetch parks for a specific location, None if it failed after the session's retries."""
+    if SESSION is None:
         print(f"Error: requests module not available for {descriptor}")
-        return []
+        return None
         
-    for attempt in range(max_retries):
-        try:
-            url = f"https://api.pota.app/location/parks/{descriptor}"
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            parks_data = response.json()
-            print(f"  {descriptor}: {len(parks_data)} parks")
-            return parks_data
-            
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"  {descriptor}: Retry {attempt + 1} after error: {e}")
-                time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-            else:
-                print(f"  {descriptor}: Failed after {max_retries} attempts: {e}")
-                return []
-    
-    return []
+    try:
+        url = f"https://api.pota.app/location/parks/{descriptor}"
+        return fetch_json_cached(url, PARKS_MAX_AGE)
+        
+    except Exception as e:
+        print(f"  {descriptor}: Failed: {e}")
+        return None
 
 def generate_sota_data():
     """Generate SOTA summits data using memory-channels-processor."""
@@ -173,27 +161,17 @@ def generate_sota_data():
         print(f"Error running memory-channels-processor: {e}")
         return False
 
-def create_pota_gps_files():
-    """Create POTA parks GPS format files by country."""
+def create_pota_gps_files(countries=None):
+    """Create POTA parks GPS format files by country, all countries unless limited to some."""
     print("POTA Parks GPS Format Generator")
     print("=" * 60)
     
-    # Group assignments
-    group_map = {
-        'AT': {'group': 'U', 'group_name': 'POTA-AT'},
-        'SK': {'group': 'V', 'group_name': 'POTA-SK'},
-        'SG': {'group': 'W', 'group_name': 'POTA-SG'}
-    }
-    
-    # Create output directories
-    Path('POTA-GPS').mkdir(exist_ok=True)
-    Path('POTA-GPS/Austria').mkdir(exist_ok=True)
-    Path('POTA-GPS/Slovakia').mkdir(exist_ok=True)
-    Path('POTA-GPS/Singapore').mkdir(exist_ok=True)
-    
     current_date = datetime.now().strftime('%m/%d/%Y')
-    country_parks = {'AT': [], 'SK': [], 'SG': []}
-    location_parks = {}
+    # Only the selected countries get an entry, parks of other countries are not fetched
+    country_parks = {
+        country_code: [] for country_code in POTA_COUNTRIES
+        if not countries or country_code in countries
+    }
     country_totals = {}
     
     # Fetch POTA data
@@ -202,16 +180,22 @@ def create_pota_gps_files():
         print("Failed to fetch POTA location data")
         return 0
     
+    # Fetch parks for all locations concurrently, results keep location order
+    descriptors = [location.get('descriptor', '') for location in locations]
+    descriptors = [descriptor for descriptor in descriptors if descriptor.split('-')[0] in country_parks]
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_FETCHES) as executor:
+        parks_by_location = list(executor.map(fetch_parks_for_location, descriptors))
+    
     # Process each location
-    for location in locations:
-        descriptor = location.get('descriptor', '')
-        country_prefix = descriptor.split('-')[0]
-        
-        if country_prefix not in group_map:
+    for descriptor, parks in zip(descriptors, parks_by_location):
+        # Failed fetches were already reported, there is no park count to show
+        if parks is None:
             continue
         
-        parks = fetch_parks_for_location(descriptor)
-        location_parks[descriptor] = []
+        country_prefix = descriptor.split('-')[0]
+        group, group_name, country_name = POTA_COUNTRIES[country_prefix]
+        print(f"  {descriptor}: {len(parks)} parks")
+        location_parks = []
         
         for park in parks:
             try:
@@ -227,74 +211,66 @@ def create_pota_gps_files():
                 if lat is None or lon is None:
                     continue
                 
-                # Clean name for display
-                clean_name = convert_umlauts(name)
-                if len(clean_name) > 50:
-                    clean_name = clean_name[:47] + "..."
+                # Clean name for display, truncated on its own before the park number is added
+                clean_name = fit_display_name('', convert_umlauts(name))
                 
                 # Format park number (remove prefix and leading zeros)
                 park_number = park_ref.split('-')[1].lstrip('0') if '-' in park_ref else park_ref
                 
-                group_info = group_map[country_prefix]
-                
-                gps_entry = {
-                    'Group': group_info['group'],
-                    'Group Name': group_info['group_name'],
-                    'Name': f"{park_number} {clean_name}",
-                    'Date': current_date,
-                    'Time': '00:00:00',
-                    'Latitude': lat,
-                    'Longitude': lon,
-                    'Altitude': '',
-                    'Alarm': 'OFF'
-                }
+                # Same column order as GPS_FIELDNAMES
+                gps_entry = (
+                    group, group_name, f"{park_number} {clean_name}",
+                    current_date, '00:00:00', lat, lon, '', 'OFF'
+                )
                 
-                country_parks[country_prefix].append(gps_entry)
-                location_parks[descriptor].append(gps_entry)
+                location_parks.append(gps_entry)
                 
             except Exception as e:
                 print(f"Error processing park {park.get('reference', 'unknown')}: {e}")
                 continue
+        
+        if not location_parks:
+            continue
+        
+        # Create the output directory with the country's first location file, POTA-GPS included
+        if not country_parks[country_prefix]:
+            os.makedirs(f"POTA-GPS/{country_name}", exist_ok=True)
+        
+        # Write the location-specific file right away, only the country rows stay in memory
+        write_gps_csv(f"POTA-GPS/{country_name}/{descriptor}.csv", location_parks)
+        country_parks[country_prefix].extend(location_parks)
     
     total_parks = 0
+    country_files = []  # Country files written below, for the combined master file
     
     # Write country files
     for country_code, parks in country_parks.items():
         if not parks:
             continue
             
-        country_name = {'AT': 'Austria', 'SK': 'Slovakia', 'SG': 'Singapore'}[country_code]
-        group_info = group_map[country_code]
+        group, _, country_name = POTA_COUNTRIES[country_code]
         
         # Write country-wide file
         country_filename = f"POTA-GPS/pota_{country_code.lower()}_all.csv"
         write_gps_csv(country_filename, parks)
+        country_files.append(country_filename)
         
         country_totals[country_code] = {
             'name': country_name,
             'parks': len(parks),
-            'group': group_info['group']
+            'group': group
         }
         
         total_parks += len(parks)
-        print(f"Created {country_name}: {len(parks)} parks (Group {group_info['group']})")
-    
-    # Write location-specific files
-    for descriptor, parks in location_parks.items():
-        if parks:
-            country_name = {'AT': 'Austria', 'SK': 'Slovakia', 'SG': 'Singapore'}[descriptor.split('-')[0]]
-            location_filename = f"POTA-GPS/{country_name}/{descriptor}.csv"
-            write_gps_csv(location_filename, parks)
+        print(f"Created {country_name}: {len(parks)} parks (Group {group})")
     
     # Create master combined file
     print("Creating master combined file...")
-    all_parks = []
-    for parks in country_parks.values():
-        all_parks.extend(parks)
     
-    if all_parks:
-        write_gps_csv('POTA-GPS/pota_all_countries.csv', all_parks)
-        print(f"Created master file with {len(all_parks)} parks")
+    # Country files written above, no second pass over the parks
+    if country_files:
+        combine_gps_csvs('POTA-GPS/pota_all_countries.csv', country_files)
+        print(f"Created master file with {total_parks} parks")
     
     # Print summary
     print(f"\nSuccessfully processed {total_parks} POTA parks")
@@ -303,18 +279,11 @@ def create_pota_gps_files():
     
     return total_parks
 
-def create_sota_gps_files():
-    """Create SOTA summits GPS format files by country."""
+def create_sota_gps_files(countries=None):
+    """Create SOTA summits GPS format files by country, all countries unless limited to some."""
     print("SOTA Summits GPS Format Generator")
     print("=" * 60)
     
-    # Group assignments compatible with POTA format
-    group_map = {
-        'AUT': {'group': 'X', 'group_name': 'SOTA-AT'},
-        'SVK': {'group': 'Y', 'group_name': 'SOTA-SK'},
-        'SGP': {'group': 'Z', 'group_name': 'SOTA-SG'}
-    }
-    
     # Check if SOTA data exists, generate if needed
     if not Path('sota_summits.csv').exists():
         print("SOTA data not found, generating...")
@@ -322,30 +291,34 @@ def create_sota_gps_files():
             print("Failed to generate SOTA data")
             return 0
     
-    # Create output directories
-    Path('SOTA-GPS').mkdir(exist_ok=True)
-    Path('SOTA-GPS/Austria').mkdir(exist_ok=True)
-    Path('SOTA-GPS/Slovakia').mkdir(exist_ok=True)
-    Path('SOTA-GPS/Singapore').mkdir(exist_ok=True)
-    
     current_date = datetime.now().strftime('%m/%d/%Y')
-    country_summits = {'AUT': [], 'SVK': [], 'SGP': []}
+    # Only the selected countries get an entry, summits of other countries are skipped
+    selected_codes = {SOTA_COUNTRY_CODES[country] for country in countries or SOTA_COUNTRY_CODES}
+    country_summits = {
+        country_code: [] for country_code in SOTA_COUNTRIES
+        if country_code in selected_codes
+    }
     country_totals = {}
     
     # Read and process SOTA data
     try:
         with open('sota_summits.csv', 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
+            index, rows = read_rows_with_defaults(csv.reader(csvfile), SOTA_COLUMN_DEFAULTS)
+            
+            country_code_idx = index['country_code']
+            name_idx = index['name']
+            lat_idx = index['lat']
+            long_idx = index['long']
             
-            for row in reader:
-                country_code = row.get('country_code', '').upper()
-                if country_code not in group_map:
+            for row in rows:
+                country_code = row[country_code_idx].upper()
+                if country_code not in country_summits:
                     continue
                 
                 try:
-                    name = row.get('name', '')
-                    lat = float(row.get('lat', 0))
-                    lon = float(row.get('long', 0))
+                    name = row[name_idx]
+                    lat = float(row[lat_idx])
+                    lon = float(row[long_idx])
                     
                     if not name or lat == 0 or lon == 0:
                         continue
@@ -354,23 +327,15 @@ def create_sota_gps_files():
                     clean_name = convert_umlauts(name)
                     
                     # Format for GPS display (summit name, truncate if needed)
-                    display_name = clean_name
-                    if len(display_name) > 50:
-                        display_name = display_name[:47] + "..."
+                    display_name = fit_display_name('', clean_name)
                     
-                    group_info = group_map[country_code]
+                    group, group_name, _ = SOTA_COUNTRIES[country_code]
                     
-                    gps_entry = {
-                        'Group': group_info['group'],
-                        'Group Name': group_info['group_name'],
-                        'Name': display_name,
-                        'Date': current_date,
-                        'Time': '00:00:00',
-                        'Latitude': lat,
-                        'Longitude': lon,
-                        'Altitude': '',
-                        'Alarm': 'OFF'
-                    }
+                    # Same column order as GPS_FIELDNAMES
+                    gps_entry = (
+                        group, group_name, display_name,
+                        current_date, '00:00:00', lat, lon, '', 'OFF'
+                    )
                     
                     country_summits[country_code].append(gps_entry)
                     
@@ -386,41 +351,44 @@ def create_sota_gps_files():
         return 0
     
     total_summits = 0
+    country_files = []  # Country files written below, for the combined master file
     
     # Write country files
     for country_code, summits in country_summits.items():
         if not summits:
             continue
             
-        country_name = {'AUT': 'Austria', 'SVK': 'Slovakia', 'SGP': 'Singapore'}[country_code]
-        group_info = group_map[country_code]
+        group, _, country_name = SOTA_COUNTRIES[country_code]
+        
+        # Create the output directory for the region file, SOTA-GPS included
+        os.makedirs(f"SOTA-GPS/{country_name}", exist_ok=True)
         
         # Write country-wide file
         country_filename = f"SOTA-GPS/sota_{country_code.lower()}_all.csv"
         write_gps_csv(country_filename, summits)
+        country_files.append(country_filename)
         
         # Create region-specific files (simplified - one file per country for SOTA)
+        # Same content as the country-wide file, copied instead of formatted again
         region_filename = f"SOTA-GPS/{country_name}/sota_{country_code.lower()}.csv"
-        write_gps_csv(region_filename, summits)
+        shutil.copyfile(country_filename, region_filename)
         
         country_totals[country_code] = {
             'name': country_name,
             'summits': len(summits),
-            'group': group_info['group']
+            'group': group
         }
         
         total_summits += len(summits)
-        print(f"Created {country_name}: {len(summits)} summits (Group {group_info['group']})")
+        print(f"Created {country_name}: {len(summits)} summits (Group {group})")
     
     # Create master combined file
     print("Creating master combined file...")
-    all_summits = []
-    for summits in country_summits.values():
-        all_summits.extend(summits)
     
-    if all_summits:
-        write_gps_csv('SOTA-GPS/sota_all_countries.csv', all_summits)
-        print(f"Created master file with {len(all_summits)} summits")
+    # Country files written above, no second pass over the summits
+    if country_files:
+        combine_gps_csvs('SOTA-GPS/sota_all_countries.csv', country_files)
+        print(f"Created master file with {total_summits} summits")
     
     # Print summary
     print(f"\nSuccessfully processed {total_summits} SOTA summits")
@@ -429,21 +397,6 @@ def create_sota_gps_files():
     
     return total_summits
 
-def write_gps_csv(filename, gps_data):
-    """Write GPS data in CSV format."""
-    if not gps_data:
-        return
-    
-    # GPS CSV header
-    fieldnames = ['Group', 'Group Name', 'Name', 'Date', 'Time', 'Latitude', 'Longitude', 'Altitude', 'Alarm']
-    
-    with open(filename, 'w', encoding='utf-8', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for entry in gps_data:
-            writer.writerow(entry)
-
 def main():
     parser = argparse.ArgumentParser(
         description='Unified GPS Data Generator for Icom ID-52PLUS',
@@ -485,13 +438,13 @@ Examples:
     
     # Generate POTA data
     if args.pota:
-        pota_count = create_pota_gps_files()
+        pota_count = create_pota_gps_files(args.countries)
         total_generated += pota_count
         print()
     
     # Generate SOTA data
     if args.sota:
-        sota_count = create_sota_gps_files()
+        sota_count = create_sota_gps_files(args.countries)
         total_generated += sota_count
         print()
     
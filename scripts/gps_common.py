@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Shared CSV and GPS waypoint helpers
+Name conversion, CSV reading, gpsexample.csv writing and cached POTA API access for the generator scripts
+"""
+
+import csv
+import functools
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None  # The POTA scripts warn about this, SOTA needs no network access
+
+# orjson decodes API responses several times faster, json works the same way
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+COPY_CHUNK_SIZE = 1 << 20
+
+# Concurrent requests to the POTA API, small enough to stay polite
+MAX_PARALLEL_FETCHES = 8
+
+# Request budget for the POTA API, bursts below it are sent without delay
+MAX_REQUESTS_PER_SECOND = 10
+REQUEST_LOCK = threading.Lock()
+REQUEST_TIMES = deque()  # Start times of the requests in the last second
+
+# On-disk API response cache, revalidated with ETags once stale
+CACHE_DIR = Path('.pota_cache')
+LOCATIONS_MAX_AGE = 7 * 24 * 3600  # Program locations rarely change
+PARKS_MAX_AGE = 24 * 3600
+
+# One keep-alive connection pool shared by all API requests, None without requests
+SESSION = None
+if requests is not None:
+    SESSION = requests.Session()
+    SESSION.mount('https://', HTTPAdapter(
+        pool_maxsize=MAX_PARALLEL_FETCHES,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    ))
+
+# GPS CSV header (gpsexample.csv format)
+GPS_FIELDNAMES = ['Group', 'Group Name', 'Name', 'Date', 'Time', 'Latitude', 'Longitude', 'Altitude', 'Alarm']
+
+# Header line as written by csv.writer, all GPS files share it
+GPS_HEADER_LINE = ','.join(GPS_FIELDNAMES) + '\r\n'
+GPS_HEADER_BYTES = GPS_HEADER_LINE.encode('utf-8')
+
+# Longest name the radio's GPS memory list shows, longer names end in "..."
+MAX_DISPLAY_NAME_LENGTH = 50
+
+UMLAUT_MAP = {
+    'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue',
+    'ß': 'ss', 'é': 'e', 'É': 'E', 'è': 'e', 'È': 'E',
+    'á': 'a', 'Á': 'A', 'à': 'a', 'À': 'A', 'í': 'i', 'Í': 'I',
+    'ì': 'i', 'Ì': 'I', 'ó': 'o', 'Ó': 'O', 'ò': 'o', 'Ò': 'O',
+    'ú': 'u', 'Ú': 'U', 'ù': 'u', 'Ù': 'U', 'ñ': 'n', 'Ñ': 'N',
+    'ç': 'c', 'Ç': 'C', '–': '-', '—': '-',
+    '“': '"', '”': '"', '‘': "'", '’': "'",
+    '…': '...', 'ř': 'r', 'Ř': 'R',
+    'ľ': 'l', 'Ľ': 'L', 'š': 's', 'Š': 'S', 'ť': 't', 'Ť': 'T',
+    'ž': 'z', 'Ž': 'Z', 'ý': 'y', 'Ý': 'Y', 'č': 'c', 'Č': 'C',
+    'ď': 'd', 'Ď': 'D', 'ň': 'n', 'Ň': 'N', 'ô': 'o', 'Ô': 'O'
+}
+
+# Single-pass translation table, handles the multi-character replacements too
+UMLAUT_TABLE = str.maketrans(UMLAUT_MAP)
+
+# Park and summit names repeat across locations, translate each distinct name once
+@functools.lru_cache(maxsize=None)
+def convert_umlauts(text):
+    """Convert German, Slovak and special characters to ASCII equivalents."""
+    # Every key in the table is non-ASCII, most names need no work
+    if not text or text.isascii():
+        return text
+    
+    return text.translate(UMLAUT_TABLE)
+
+def fit_display_name(prefix, name):
+    """Join prefix and name, shortening the name so the result fits MAX_DISPLAY_NAME_LENGTH."""
+    room = MAX_DISPLAY_NAME_LENGTH - len(prefix)
+    if len(name) <= room:
+        return prefix + name
+    return prefix + name[:room - 3] + '...'
+
+def gps_csv_lines(gps_rows):
+    """Yield GPS rows as CSV lines, the same text csv.writer writes for them."""
+    # Only the name is free text, the other fields never need quoting,
+    # so rows with a plain name are formatted directly
+    quoted = io.StringIO()
+    quote_writer = csv.writer(quoted)
+    
+    for group, group_name, name, date, time, lat, lon, altitude, alarm in gps_rows:
+        if ',' in name or '"' in name or '\n' in name or '\r' in name:
+            quote_writer.writerow((group, group_name, name, date, time, lat, lon, altitude, alarm))
+            yield quoted.getvalue()
+            quoted.seek(0)
+            quoted.truncate()
+        else:
+            yield f"{group},{group_name},{name},{date},{time},{lat},{lon},{altitude},{alarm}\r\n"
+
+def write_gps_csv(filename, gps_rows):
+    """Write GPS rows, in GPS_FIELDNAMES column order, as a GPS CSV file."""
+    if not gps_rows:
+        return
+    
+    with open(filename, 'w', encoding='utf-8', newline='') as csvfile:
+        csvfile.write(GPS_HEADER_LINE)
+        csvfile.writelines(gps_csv_lines(gps_rows))
+
+def combine_gps_csvs(filename, gps_filenames):
+    """Write one GPS CSV file with the data rows of several GPS CSV files."""
+    # All GPS files share the header, append their data rows as raw bytes
+    with open(filename, 'wb') as outfile:
+        outfile.write(GPS_HEADER_BYTES)
+        
+        for gps_filename in gps_filenames:
+            with open(gps_filename, 'rb') as infile:
+                infile.readline()  # Skip header, written once above
+                shutil.copyfileobj(infile, outfile, COPY_CHUNK_SIZE)
+
+def read_rows_with_defaults(reader, defaults):
+    """Read the header from a csv.reader, return column positions and the padded data rows."""
+    # Plain rows with column positions from the header, no dict per row
+    header = next(reader, [])
+    width = len(header)
+    
+    # Columns this file lacks are appended to every row with their default value
+    missing = [column for column in defaults if column not in header]
+    fill = [defaults[column] for column in missing]
+    index = {column: i for i, column in enumerate(header + missing)}
+    
+    def rows():
+        for row in reader:
+            # Blank lines carry no record
+            if not row:
+                continue
+            if len(row) != width:
+                row = (row + [''] * width)[:width]
+            if fill:
+                row += fill
+            yield row
+    
+    return index, rows()
+
+def wait_for_request_slot():
+    """Block until another API request fits into MAX_REQUESTS_PER_SECOND."""
+    with REQUEST_LOCK:
+        now = time.monotonic()
+        while REQUEST_TIMES and now - REQUEST_TIMES[0] >= 1:
+            REQUEST_TIMES.popleft()
+        
+        if len(REQUEST_TIMES) >= MAX_REQUESTS_PER_SECOND:
+            time.sleep(1 - (now - REQUEST_TIMES.popleft()))
+        
+        REQUEST_TIMES.append(time.monotonic())
+
+def replace_cache_file(path, data):
+    """Write bytes to a cache file through a temporary file, so it is never left half written."""
+    with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix='.part', delete=False) as tmpfile:
+        try:
+            tmpfile.write(data)
+        except BaseException:
+            tmpfile.close()
+            os.unlink(tmpfile.name)
+            raise
+    os.replace(tmpfile.name, path)
+
+def fetch_json_cached(url, max_age):
+    """Fetch a JSON API response, reusing the cached copy while fresh or unchanged."""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    body_path = CACHE_DIR / f'{key}.json'
+    etag_path = CACHE_DIR / f'{key}.etag'
+    
+    if body_path.exists() and time.time() - body_path.stat().st_mtime < max_age:
+        return json_loads(body_path.read_bytes())
+    
+    headers = {}
+    if body_path.exists() and etag_path.exists():
+        headers['If-None-Match'] = etag_path.read_text()
+    
+    wait_for_request_slot()
+    response = SESSION.get(url, headers=headers, timeout=30)
+    if response.status_code == 304:
+        body_path.touch()  # Unchanged, fresh for another max_age
+        return json_loads(body_path.read_bytes())
+    response.raise_for_status()
+    
+    CACHE_DIR.mkdir(exist_ok=True)
+    # The body goes first, an ETag never describes a body that was not stored
+    replace_cache_file(body_path, response.content)
+    etag = response.headers.get('ETag')
+    if etag:
+        replace_cache_file(etag_path, etag.encode('utf-8'))
+    elif etag_path.exists():
+        etag_path.unlink()
+    
+    return json_loads(response.content)
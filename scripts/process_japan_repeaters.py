@@ -4,10 +4,64 @@ Japanese Repeater Processor
 Converts Japanese repeater CSV to memory-channels-processor format and creates GPS-enhanced version
 """
 
+import codecs
 import csv
+import functools
+import io
 import sys
 from pathlib import Path
 
+from gps_common import read_rows_with_defaults
+
+# Bytes decoded with each candidate encoding to pick the one the file uses
+ENCODING_SAMPLE_SIZE = 8192
+
+# Columns read from the Icom repeater CSV, with the value used when a file lacks one
+ICOM_COLUMN_DEFAULTS = {
+    'Frequency': '', 'Dup': '', 'Offset': '', 'Mode': 'FM', 'TONE': '',
+    'Repeater Tone': '88.5Hz', 'Repeater Call Sign': '', 'Gateway Call Sign': '',
+    'Name': '', 'Sub Name': '', 'Group Name': '', 'Position': '',
+    'Latitude': '0', 'Longitude': '0'
+}
+
+# Amateur band edges in MHz, checked in order, frequencies outside all of them are 'unknown'
+BAND_RANGES = (
+    (28, 30, '10m'),
+    (50, 54, '6m'),
+    (144, 148, '2m'),
+    (430, 450, '70cm'),
+    (1240, 1300, '23cm')
+)
+
+# Repeaters share a handful of frequencies, look up each one's band once
+@functools.lru_cache(maxsize=None)
+def band_for_frequency(frequency):
+    """Return the band name for a frequency in MHz."""
+    for low, high, band in BAND_RANGES:
+        if low <= frequency <= high:
+            return band
+    return 'unknown'
+
+# Repeaters share a handful of standard shifts, parse each dup and offset pair once
+@functools.lru_cache(maxsize=None)
+def parse_duplex(dup_setting, offset):
+    """Return the dup direction and offset in MHz for an Icom Dup setting and offset text."""
+    offset_mhz = float(offset)
+    if dup_setting == 'DUP+':
+        return '+', offset_mhz
+    elif dup_setting == 'DUP-':
+        return '-', offset_mhz
+    return '', offset_mhz
+
+# Only a few dozen CTCSS tones exist, parse each one once
+@functools.lru_cache(maxsize=None)
+def parse_tone(repeater_tone):
+    """Return the CTCSS frequency for an Icom repeater tone text, 88.5 if it has none."""
+    try:
+        return float(repeater_tone.replace('Hz', ''))
+    except ValueError:
+        return 88.5
+
 def convert_japanese_csv_to_mcp_format(input_file, output_file):
     """Convert Japanese Icom CSV to memory-channels-processor CSV format."""
     
@@ -22,63 +76,70 @@ def convert_japanese_csv_to_mcp_format(input_file, output_file):
         'simplex', 'split', 'multimode', 'name_formatted', 'distance', 'heading'
     ]
     
-    processed_count = 0
+    # Converted rows, written with a single writerows call
+    mcp_rows = []
     
     # Try different encodings for Japanese text
     encodings_to_try = ['shift_jis', 'utf-8', 'cp932', 'euc-jp', 'iso-2022-jp']
     
+    # The file is opened once, candidates are tried on a sample of its bytes
+    rawfile = open(input_file, 'rb')
+    sample = rawfile.read(ENCODING_SAMPLE_SIZE)
+    rawfile.seek(0)
+    
     infile = None
     for encoding in encodings_to_try:
         try:
-            infile = open(input_file, 'r', encoding=encoding)
-            infile.read(100)  # Test read
-            infile.seek(0)  # Reset to beginning
-            print(f"Using encoding: {encoding}")
-            break
+            # Incremental decoder, a character cut off at the end of the sample is no error
+            codecs.getincrementaldecoder(encoding)().decode(sample)
         except UnicodeDecodeError:
-            if infile:
-                infile.close()
             continue
+        infile = io.TextIOWrapper(rawfile, encoding=encoding)
+        print(f"Using encoding: {encoding}")
+        break
     
     if not infile:
+        rawfile.close()
         raise ValueError("Could not determine file encoding")
     
     with infile, open(output_file, 'w', encoding='utf-8', newline='') as outfile:
         
-        reader = csv.DictReader(infile)
-        writer = csv.DictWriter(outfile, fieldnames=mcp_header)
-        writer.writeheader()
+        index, rows = read_rows_with_defaults(csv.reader(infile), ICOM_COLUMN_DEFAULTS)
+        
+        frequency_idx = index['Frequency']
+        dup_idx = index['Dup']
+        offset_idx = index['Offset']
+        mode_idx = index['Mode']
+        tone_idx = index['TONE']
+        repeater_tone_idx = index['Repeater Tone']
+        repeater_call_sign_idx = index['Repeater Call Sign']
+        gateway_call_sign_idx = index['Gateway Call Sign']
+        name_idx = index['Name']
+        sub_name_idx = index['Sub Name']
+        group_name_idx = index['Group Name']
+        position_idx = index['Position']
+        latitude_idx = index['Latitude']
+        longitude_idx = index['Longitude']
+        
+        writer = csv.writer(outfile)
+        writer.writerow(mcp_header)
         
-        for row in reader:
+        for row in rows:
             try:
                 # Extract frequency and convert to float
-                frequency = float(row['Frequency'])
+                frequency = float(row[frequency_idx])
                 
                 # Determine band based on frequency
-                if 28 <= frequency <= 30:
-                    band = '10m'
-                elif 50 <= frequency <= 54:
-                    band = '6m'  
-                elif 144 <= frequency <= 148:
-                    band = '2m'
-                elif 430 <= frequency <= 450:
-                    band = '70cm'
-                elif 1240 <= frequency <= 1300:
-                    band = '23cm'
-                else:
-                    band = 'unknown'
+                band = band_for_frequency(frequency)
                 
                 # Calculate offset and determine duplex
                 try:
-                    offset_mhz = float(row['Offset'])
-                    if row['Dup'] == 'DUP+':
-                        dup = '+'
+                    dup, offset_mhz = parse_duplex(row[dup_idx], row[offset_idx])
+                    if dup == '+':
                         freq_rx = frequency - offset_mhz
-                    elif row['Dup'] == 'DUP-':
-                        dup = '-'
+                    elif dup == '-':
                         freq_rx = frequency + offset_mhz
                     else:
-                        dup = ''
                         freq_rx = frequency
                 except (ValueError, KeyError):
                     dup = ''
@@ -86,70 +147,47 @@ def convert_japanese_csv_to_mcp_format(input_file, output_file):
                     offset_mhz = 0
                 
                 # Determine mode
-                mode_str = row.get('Mode', 'FM')
+                mode_str = row[mode_idx]
                 is_dstar = (mode_str == 'DV')
                 is_fm = (mode_str == 'FM' or mode_str == 'DV')  # D-STAR can do FM too
                 
                 # Extract CTCSS
-                ctcss_tone = row.get('Repeater Tone', '88.5Hz').replace('Hz', '')
-                try:
-                    ctcss_freq = float(ctcss_tone)
-                except ValueError:
-                    ctcss_freq = 88.5
-                
-                # Create MCP format row
-                mcp_row = {
-                    'callsign': row.get('Repeater Call Sign', '').replace(' A', '').replace(' B', '').strip(),
-                    'name': row.get('Name', '').strip(),
-                    'band': band,
-                    'freq_tx': frequency,
-                    'freq_rx': freq_rx,
-                    'ctcss_tx': ctcss_freq if row.get('TONE') != 'OFF' else '',
-                    'ctcss_rx': ctcss_freq if row.get('TONE') != 'OFF' else '',
-                    'c4fm': False,
-                    'dmr': False,
-                    'dmr_id': '',
-                    'dmr_cc': '',
-                    'dstar': is_dstar,
-                    'dstar_rpt1': row.get('Repeater Call Sign', '') if is_dstar else '',
-                    'dstar_rpt2': row.get('Gateway Call Sign', '') if is_dstar else '',
-                    'fm': is_fm,
-                    'landmark': row.get('Sub Name', '').strip(),
-                    'state': row.get('Group Name', '').strip(),
-                    'country': 'Japan',
-                    'country_code': 'JPN',
-                    'loc_exact': row.get('Position') == 'Exact',
-                    'lat': float(row.get('Latitude', 0)),
-                    'long': float(row.get('Longitude', 0)),
-                    'locator': '',  # Could calculate from lat/long if needed
-                    'sea_level': '',
-                    'skip': False,
-                    'scan_group': '',
-                    'source_id': 'japan-icom-csv',
-                    'source_name': 'Japan Icom Repeater CSV',
-                    'source_provider': 'Icom Japan',
-                    'source_type': 'static',
-                    'source_license': '',
-                    'source_url': 'https://www.icom.co.jp/support/drivers/8557/',
-                    'offset': abs(offset_mhz),
-                    'dup': dup,
-                    'ctcss': row.get('TONE') != 'OFF',
-                    'simplex': (dup == ''),
-                    'split': False,
-                    'multimode': is_dstar,  # D-STAR can do multiple modes
-                    'name_formatted': row.get('Name', '').strip(),
-                    'distance': '',
-                    'heading': ''
-                }
+                ctcss_freq = parse_tone(row[repeater_tone_idx])
                 
-                writer.writerow(mcp_row)
-                processed_count += 1
+                # Create MCP format row, same column order as mcp_header
+                repeater_call_sign = row[repeater_call_sign_idx]
+                name = row[name_idx].strip()
+                has_tone = row[tone_idx] != 'OFF'
+                mcp_rows.append((
+                    repeater_call_sign.replace(' A', '').replace(' B', '').strip(), name, band,
+                    frequency, freq_rx,
+                    ctcss_freq if has_tone else '', ctcss_freq if has_tone else '',
+                    False, False, '', '',  # c4fm, dmr, dmr_id, dmr_cc
+                    is_dstar,
+                    repeater_call_sign if is_dstar else '',
+                    row[gateway_call_sign_idx] if is_dstar else '',
+                    is_fm, row[sub_name_idx].strip(), row[group_name_idx].strip(),
+                    'Japan', 'JPN', row[position_idx] == 'Exact',
+                    float(row[latitude_idx]), float(row[longitude_idx]),
+                    '',  # locator, could calculate from lat/long if needed
+                    '', False, '',  # sea_level, skip, scan_group
+                    'japan-icom-csv', 'Japan Icom Repeater CSV', 'Icom Japan', 'static', '',
+                    'https://www.icom.co.jp/support/drivers/8557/',
+                    abs(offset_mhz), dup, has_tone,
+                    dup == '',  # simplex
+                    False,  # split
+                    is_dstar,  # multimode, D-STAR can do multiple modes
+                    name,  # name_formatted
+                    '', ''  # distance, heading
+                ))
                 
             except (ValueError, KeyError) as e:
                 print(f"Warning: Skipping row due to error: {e}")
                 continue
+        
+        writer.writerows(mcp_rows)
     
-    return processed_count
+    return len(mcp_rows)
 
 def main():
     input_file = '/mnt/c/Users/sebastian.schiegl/Github/memoryicomscript/rptexample.csv'